@@ -17,29 +17,33 @@ from pathlib import Path
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+# Keep numeric libraries single-threaded: spaCy may load on a background
+# thread alongside parsing, and one OpenMP pool per core would oversubscribe
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
 from xml_handler import XMLHandler
+from ner_module import preload_ner
 
 
 def main():
     """Main execution function"""
     
-    print("="*80)
-    print("Financial Note Tagger - Assignment 1")
-    print("="*80)
-    print()
+    sys.stdout.write("="*80 + "\nFinancial Note Tagger - Assignment 1\n" + "="*80 + "\n\n")
     
     # Parse command line arguments
     if len(sys.argv) < 3:
-        print("Usage: python main.py <input_xml> <output_xml>")
-        print("\nExample:")
-        print("  python main.py data/note_1_input_v1_1.xml output/note_1_output.xml")
-        print()
+        sys.stdout.write(
+            "Usage: python main.py <input_xml> <output_xml>\n"
+            "\nExample:\n"
+            "  python main.py data/note_1_input_v1_1.xml output/note_1_output.xml\n\n"
+        )
         
         # Try to use default files if they exist
         input_file = "data/note_1_input_v1_1.xml"
         output_file = "output/note_1_output.xml"
+        input_path = Path(input_file)
         
-        if os.path.exists(input_file):
+        if input_path.is_file():
             print(f"Using default input file: {input_file}")
         else:
             print(f"Error: Input file not found: {input_file}")
@@ -47,53 +51,59 @@ def main():
     else:
         input_file = sys.argv[1]
         output_file = sys.argv[2]
+        input_path = Path(input_file)
+        
+        # Validate input file exists
+        if not input_path.is_file():
+            print(f"Error: Input file not found: {input_file}")
+            sys.exit(1)
     
-    # Validate input file exists
-    if not os.path.exists(input_file):
-        print(f"Error: Input file not found: {input_file}")
-        sys.exit(1)
+    # Start loading the NER model now so it overlaps with setup and parsing
+    preload_ner()
     
-    # Create output directory if it doesn't exist
-    output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    # Create output directory if it doesn't exist (one mkdir, no separate stat)
+    output_dir = Path(output_file).parent
+    try:
+        output_dir.mkdir(parents=True)
         print(f"Created output directory: {output_dir}")
+    except FileExistsError:
+        pass
     
     # Process the file
     try:
-        handler = XMLHandler()
-        
-        print(f"Extraction Mode: {handler.tagger.get_extraction_mode()}")
-        print()
+        # Large notes are tagged across all cores (small ones stay in-process)
+        handler = XMLHandler(workers=os.cpu_count() or 1)
         
         handler.process_file(input_file, output_file)
         
+        sys.stdout.write(f"\nExtraction Mode: {handler.tagger.get_extraction_mode()}\n")
+        
         # Show statistics
         handler.tagger.print_stats()
         
-        print()
-        print("="*80)
-        print("SUCCESS!")
-        print("="*80)
-        print(f"Input:  {input_file}")
-        print(f"Output: {output_file}")
+        sys.stdout.write(
+            "\n" + "="*80 + "\nSUCCESS!\n" + "="*80 + "\n"
+            f"Input:  {input_file}\n"
+            f"Output: {output_file}\n"
+        )
         
         # If expected output exists, compare
-        expected_file = "data/note_1_expected_output_v1_1.xml"
-        if os.path.exists(expected_file):
-            print()
-            print("Comparing with expected output...")
+        expected_file = Path("data/note_1_expected_output_v1_1.xml")
+        if expected_file.is_file():
+            sys.stdout.write("\nComparing with expected output...\n")
             handler.compare_with_expected(output_file, expected_file)
         
     except Exception as e:
-        print()
-        print("="*80)
-        print("ERROR!")
-        print("="*80)
-        print(f"An error occurred: {str(e)}")
+        sys.stdout.write(
+            "\n" + "="*80 + "\nERROR!\n" + "="*80 + "\n"
+            f"An error occurred: {str(e)}\n"
+        )
+        sys.stdout.flush()  # keep the message ahead of the traceback on stderr
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    
+    sys.stdout.flush()
 
 
 if __name__ == "__main__":
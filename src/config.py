@@ -3,48 +3,269 @@ Configuration file for Financial Note Tagger
 Contains all patterns, mappings, and constants
 """
 
+import hashlib
+import os
+import platform
 import re
+import string
+from enum import IntEnum
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, List, Tuple
 
+# Try to import pyahocorasick for dictionary matching, fall back to regex
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Try to import Hyperscan for multi-pattern prefiltering, fall back to re
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Try to import RE2 (automaton-based, no backtracking) for the fused entity
+# scan, fall back to re
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+
+def _fuse_patterns(patterns: Dict[str, "re.Pattern"]) -> "re.Pattern":
+    """Fuse patterns into one alternation with a named group per key (order kept)"""
+    return re.compile('|'.join(f'(?P<{kind}>{p.pattern})' for kind, p in patterns.items()))
+
+
 # ============================================================================
 # REGEX PATTERNS
 # ============================================================================
 
+# Folds typographic quotes to ASCII. One-to-one per character, so match
+# offsets on the translated text are valid offsets into the original.
+QUOTE_TABLE = str.maketrans({
+    '\u201C': '"',
+    '\u201D': '"',
+    '\u2018': "'",
+    '\u2019': "'",
+})
+
+
 class Patterns:
-    """All regex patterns used for entity extraction"""
+    """All regex patterns used for entity extraction (compiled once at import)"""
     
     # Date patterns (ordered by specificity)
-    DATE_PATTERNS = [
+    # Non-capturing groups only: callers use the whole match
+    DATE_PATTERNS = [re.compile(p) for p in (
         # Full date with month name: "January 24, 2011"
-        r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},\s+\d{4}',
+        r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},\s+\d{4}',
         # Month and year: "August 2023"
-        r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}',
+        r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}',
         # Just year: "2023" or "2022" (must be 4 digits, 19xx or 20xx)
-        r'\b(19|20)\d{2}\b',
-    ]
+        r'\b(?:19|20)\d{2}\b',
+    )]
+    
+    # All date variants in a single alternation, so one scan covers every
+    # date form. The two month-name forms share one branch with the day
+    # optional (tried first, so "January 24, 2011" still beats "January
+    # 2011"); the month name is no longer matched twice at every candidate.
+    COMBINED_DATE_PATTERN = re.compile(
+        r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+(?:\d{1,2},\s+)?\d{4}'
+        r'|\b(?:19|20)\d{2}\b'
+    )
     
     # Financial amount pattern
     # Matches: $19,821 or $137,942 or $7,166
-    AMOUNT_PATTERN = r'\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?'
+    AMOUNT_PATTERN = re.compile(r'\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?')
+    
+    # Company name at the very start of a paragraph (used by the tagger)
+    # Matches: "BestCo Ltd. (formerly GoodCo Ltd.)" -> "BestCo Ltd."
+    LEADING_COMPANY_PATTERN = re.compile(r'^([A-Z][a-zA-Z]+\s+Ltd\.)')
     
     # Company name patterns
-    COMPANY_PATTERNS = [
+    COMPANY_PATTERNS = [re.compile(p) for p in (
         # Matches: "BestCo Ltd." or "GoodCo Ltd."
         r'\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\s+Ltd\.',
         # Also match Inc., Corp., etc.
         r'\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\s+(?:Inc\.|Corp\.|Corporation|Limited)',
-    ]
+    )]
     
     # Address pattern
     # Matches: "13th Floor, 1313 Lucky Street, Vancouver, British Columbia, Canada, V1C 2D3"
-    ADDRESS_PATTERN = r'\d+(?:st|nd|rd|th)?\s+Floor,\s+\d+\s+[A-Za-z\s]+Street,\s+[A-Za-z\s,]+,\s+[A-Z]\d[A-Z]\s+\d[A-Z]\d'
+    ADDRESS_PATTERN = re.compile(r'\d+(?:st|nd|rd|th)?\s+Floor,\s+\d+\s+[A-Za-z\s]+Street,\s+[A-Za-z\s,]+,\s+[A-Z]\d[A-Z]\s+\d[A-Z]\d')
     
     # Trading symbol pattern
-    # Matches: "BCL" in quotes (including smart quotes)
-    TRADING_SYMBOL_PATTERN = r'under the symbol\s+["\u201C]([A-Z]{2,5})["\u201D]'
+    # Matches: "BCL" in quotes. Smart quotes are folded to ASCII with
+    # QUOTE_TABLE before matching, so only the plain quote is needed here.
+    TRADING_SYMBOL_PATTERN = re.compile(r'under the symbol\s+"(?P<symbol>[A-Z]{2,5})"')
+    
+    # Incorporation date context pattern (case-insensitive)
+    INCORPORATION_CONTEXT = re.compile(
+        r'was incorporated.*?on\s+((?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},\s+\d{4})',
+        re.IGNORECASE
+    )
+    
+    # Same pattern, case-sensitive, for text that was lowercased once up front
+    INCORPORATION_CONTEXT_LOWER = re.compile(INCORPORATION_CONTEXT.pattern.lower())
+    
+    # Context-free entity patterns keyed by TAG_IDS key, in priority order.
+    # Fused into one alternation with named groups so a paragraph is scanned
+    # once; at any position the first (highest priority) alternative wins.
+    ENTITY_PATTERNS = {
+        'address': ADDRESS_PATTERN,
+        'trading_symbol': TRADING_SYMBOL_PATTERN,
+        'financial_amount': AMOUNT_PATTERN,
+        'date': COMBINED_DATE_PATTERN,
+    }
+    COMBINED_ENTITY_PATTERN = _fuse_patterns(ENTITY_PATTERNS)
     
-    # Incorporation date context pattern
-    INCORPORATION_CONTEXT = r'was incorporated.*?on\s+((?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},\s+\d{4})'
+    # Literal every match of these ENTITY_PATTERNS starts with (after quote
+    # folding), so a lone pattern only needs trying where str.find lands
+    ENTITY_ANCHORS = {
+        'trading_symbol': 'under the symbol',
+        'financial_amount': '$',
+    }
+
+
+# Per-user cache for compiled artefacts, kept out of the source tree:
+# $FINANCIAL_NOTE_TAGGER_CACHE if set, else $XDG_CACHE_HOME (default
+# ~/.cache) / financial-note-tagger
+CACHE_DIR = Path(
+    os.environ.get("FINANCIAL_NOTE_TAGGER_CACHE")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "financial-note-tagger"
+)
+
+# Compiled Hyperscan databases are saved here after the first build, so
+# later runs skip pattern compilation (~60ms of every import)
+HS_CACHE_DIR = CACHE_DIR / "hyperscan"
+
+
+def _load_or_compile_db(name: str, expressions: List[bytes], flags: List[int]) -> "hyperscan.Database":
+    """
+    Load a block-mode Hyperscan database from HS_CACHE_DIR, compiling and
+    saving it (best effort) when there is no usable cache entry
+    
+    Entries are keyed by a fingerprint of the expressions, flags, Hyperscan
+    version and machine type, so editing a pattern never loads a stale
+    database. Match ids are expression indexes.
+    
+    Raises:
+        hyperscan.error: If the expressions do not compile
+    """
+    fingerprint = hashlib.sha1(repr(
+        (expressions, flags, hyperscan.__version__, platform.machine())
+    ).encode('utf-8')).hexdigest()
+    path = HS_CACHE_DIR / f"{name}-{fingerprint}.db"
+    
+    try:
+        db = hyperscan.loadb(path.read_bytes(), hyperscan.HS_MODE_BLOCK)
+        db.scratch = hyperscan.Scratch(db)  # loadb leaves it unset
+        return db
+    except (OSError, hyperscan.error):
+        pass  # missing or unusable (e.g. built for another CPU): recompile
+    
+    db = hyperscan.Database()
+    db.compile(expressions=expressions, ids=list(range(len(expressions))), flags=flags)
+    
+    # Written to a temporary file and renamed into place, so a concurrent
+    # run never loads a half-written database
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(hyperscan.dumpb(db))
+        os.replace(tmp_path, path)
+    except (OSError, hyperscan.error):
+        # Read-only checkout: compile again next time
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+    return db
+
+
+def _build_entity_pattern_db():
+    """
+    Compile Patterns.ENTITY_PATTERNS into one Hyperscan database
+    
+    Match ids are indexes into ENTITY_PATTERNS. Hyperscan reports every
+    overlapping match rather than re's leftmost-first ones, so it is only
+    used to find which entity types occur at all (one report per type).
+    Patterns are compiled without UCP, so results only agree with re on
+    ASCII text.
+    """
+    expressions = [
+        re.sub(r'\(\?P<\w+>', '(', p.pattern).encode('ascii')  # no named groups in Hyperscan
+        for p in Patterns.ENTITY_PATTERNS.values()
+    ]
+    try:
+        return _load_or_compile_db(
+            'entity_patterns', expressions, [hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions)
+        )
+    except hyperscan.error:
+        return None
+
+
+# None when Hyperscan is not installed (or cannot compile the patterns)
+ENTITY_PATTERNS_HS = _build_entity_pattern_db() if HYPERSCAN_AVAILABLE else None
+
+
+@lru_cache(maxsize=None)
+def combined_entity_pattern(kinds: Tuple[str, ...]) -> "re.Pattern":
+    """
+    Fused entity pattern restricted to the given ENTITY_PATTERNS keys
+    
+    Alternatives that cannot match anywhere in a text never change re's
+    result, so dropping them gives the same matches with less work per
+    position. kinds must be in ENTITY_PATTERNS order.
+    """
+    return _fuse_patterns({kind: Patterns.ENTITY_PATTERNS[kind] for kind in kinds})
+
+
+# What re's \s matches among ASCII characters; RE2's \s leaves out \v and \x1c-\x1f
+_ASCII_SPACE = r'\t-\r\x1c-\x1f '
+
+
+def _re2_pattern(pattern: str) -> str:
+    """Rewrite \\s (inside and outside classes) to re's ASCII meaning for RE2"""
+    out = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == '\\':
+            escape = pattern[i:i + 2]
+            if escape == r'\s':
+                out.append(_ASCII_SPACE if in_class else f'[{_ASCII_SPACE}]')
+            else:
+                out.append(escape)
+            i += 2
+            continue
+        if pattern[i] == '[':
+            in_class = True
+        elif pattern[i] == ']':
+            in_class = False
+        out.append(pattern[i])
+        i += 1
+    return ''.join(out)
+
+
+@lru_cache(maxsize=None)
+def combined_entity_pattern_re2(kinds: Tuple[str, ...]):
+    """
+    RE2 build of combined_entity_pattern(kinds), for ASCII text only
+    
+    RE2 keeps re's leftmost-first alternation semantics, so matches are
+    the same; \\s is rewritten to re's meaning, and \\d and \\b already
+    agree on ASCII text. RE2 matches take group numbers, not names (use
+    groupindex). None when RE2 cannot compile the pattern.
+    """
+    try:
+        return re2.compile(_re2_pattern(combined_entity_pattern(kinds).pattern))
+    except re2.error:
+        return None
 
 
 # ============================================================================
@@ -70,10 +291,101 @@ FINANCIAL_CONCEPTS = {
 }
 
 
+# All financial concepts in one alternation, compiled once per process
+# (longest first, so a longer concept wins over a shorter one at the same
+# spot); the lowercase copy is matched case-sensitively against lowered text
+_CONCEPT_ALTERNATION = r'\b(?:' + '|'.join(
+    re.escape(concept) for concept in sorted(FINANCIAL_CONCEPTS, key=len, reverse=True)
+) + r')\b'
+FINANCIAL_CONCEPTS_RE = (
+    re.compile(_CONCEPT_ALTERNATION, re.IGNORECASE) if FINANCIAL_CONCEPTS else None
+)
+FINANCIAL_CONCEPTS_LOWER_RE = (
+    re.compile(_CONCEPT_ALTERNATION.lower()) if FINANCIAL_CONCEPTS else None
+)
+
+
+def _build_concept_automaton():
+    """
+    Build an Aho-Corasick automaton over the lowercased concept keys
+    
+    One O(n + matches) scan of the lowercased text then finds every
+    concept, independent of dictionary size. Values are the key lengths,
+    so a hit's start offset is end - length + 1 (every concept has the
+    same tag).
+    """
+    automaton = ahocorasick.Automaton()
+    for concept in FINANCIAL_CONCEPTS:
+        automaton.add_word(concept.lower(), len(concept))
+    automaton.make_automaton()
+    return automaton
+
+
+# None when pyahocorasick is not installed (or there is nothing to match)
+FINANCIAL_CONCEPTS_AC = (
+    _build_concept_automaton() if AHOCORASICK_AVAILABLE and FINANCIAL_CONCEPTS else None
+)
+
+
+def _build_concept_db():
+    """
+    Compile the concept keys into a caseless Hyperscan literal database
+    
+    Match ids follow FINANCIAL_CONCEPTS order. Hyperscan reports every
+    (overlapping) occurrence with its leftmost start; word boundaries are
+    checked by the caller. Byte offsets equal character offsets only for
+    ASCII text.
+    """
+    try:
+        return _load_or_compile_db(
+            'financial_concepts',
+            [re.escape(concept).encode('ascii') for concept in FINANCIAL_CONCEPTS],
+            [hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(FINANCIAL_CONCEPTS),
+        )
+    except (hyperscan.error, UnicodeEncodeError):
+        return None
+
+
+# None when Hyperscan is not installed (or there is nothing to match)
+FINANCIAL_CONCEPTS_HS = (
+    _build_concept_db() if HYPERSCAN_AVAILABLE and FINANCIAL_CONCEPTS else None
+)
+
+
 # ============================================================================
 # SUBSECTION DETECTION RULES
 # ============================================================================
 
+# Numbered section prefix: "1." / "12."
+# Leading whitespace is skipped by the pattern, so non-headers are rejected
+# without stripping (copying) the paragraph first
+_HEADER_RE = re.compile(r'\s*\d+\.')
+
+# Translation table deleting ASCII uppercase letters
+_DELETE_UPPER = str.maketrans('', '', string.ascii_uppercase)
+
+
+def _count_upper(text: str) -> int:
+    """Count uppercase characters (C-level translate for ASCII text)"""
+    if text.isascii():
+        return len(text) - len(text.translate(_DELETE_UPPER))
+    return sum(1 for c in text if c.isupper())
+
+
+@lru_cache(maxsize=2048)
+def _is_header_cached(paragraph_text: str) -> bool:
+    """Header check behind SubsectionRules.is_header, memoized per paragraph text"""
+    # Check if starts with number
+    if not _HEADER_RE.match(paragraph_text):
+        return False
+    
+    # Check if mostly uppercase (ignoring the number)
+    content = paragraph_text.partition('.')[2].strip()
+    uppercase_ratio = _count_upper(content) / max(len(content), 1)
+    
+    return uppercase_ratio > 0.5
+
+
 class SubsectionRules:
     """Rules for detecting subsections in financial notes"""
     
@@ -85,18 +397,16 @@ class SubsectionRules:
         - Start with a number followed by period
         - Are in ALL CAPS or Title Case
         - Are relatively short
-        """
-        text = paragraph_text.strip()
         
-        # Check if starts with number
-        if not re.match(r'^\d+\.', text):
-            return False
-        
-        # Check if mostly uppercase (ignoring the number)
-        content = text.split('.', 1)[1].strip() if '.' in text else text
-        uppercase_ratio = sum(1 for c in content if c.isupper()) / max(len(content), 1)
-        
-        return uppercase_ratio > 0.5
+        Results are cached per paragraph text, so re-checking a paragraph
+        (or boilerplate repeated across notes) costs a dict lookup.
+        """
+        return _is_header_cached(paragraph_text)
+    
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget the cached is_header results"""
+        _is_header_cached.cache_clear()
     
     @staticmethod
     def determine_subsection_tag(paragraph_text: str, position: int) -> str:
@@ -148,3 +458,39 @@ TAG_IDS = {
     'financial_concept': 'Financial_Concept_Placeholder',
     'financial_amount': 'Financial_Amount_Placeholder',
 }
+
+
+# ============================================================================
+# ENTITY KINDS
+# ============================================================================
+
+class EntityKind(IntEnum):
+    """Inline entity types as small integers, highest priority first"""
+    INCORPORATION_DATE = 0
+    ADDRESS = 1
+    TRADING_SYMBOL = 2
+    COMPANY_NAME = 3
+    FINANCIAL_AMOUNT = 4
+    FINANCIAL_CONCEPT = 5
+    DATE = 6
+
+
+# Dense lookups indexed by EntityKind (tuple indexing avoids string hashing)
+KIND_TO_TAG = (
+    TAG_IDS['incorporation_date'],
+    TAG_IDS['address'],
+    TAG_IDS['trading_symbol'],
+    TAG_IDS['company_name'],
+    TAG_IDS['financial_amount'],
+    TAG_IDS['financial_concept'],
+    TAG_IDS['date'],
+)
+PRIORITY_BY_KIND = tuple(ENTITY_PRIORITIES[tag_id] for tag_id in KIND_TO_TAG)
+
+# Kinds of the named groups in Patterns.COMBINED_ENTITY_PATTERN
+PATTERN_KINDS = {
+    'address': EntityKind.ADDRESS,
+    'trading_symbol': EntityKind.TRADING_SYMBOL,
+    'financial_amount': EntityKind.FINANCIAL_AMOUNT,
+    'date': EntityKind.DATE,
+}
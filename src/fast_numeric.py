@@ -0,0 +1,147 @@
+"""
+Fast Numeric Normalization Module
+Converts extracted dollar amounts (e.g. "$19,821", "$12.34") to integer cents
+
+Uses a Numba-compiled kernel for large batches of amounts
+Falls back to plain Python string parsing if Numba/NumPy are not available
+
+Also holds the compiled weighted interval scheduling kernel used by the
+tagger's overlap resolution on large entity sets
+"""
+
+import importlib.util
+from typing import List, Sequence, Tuple
+
+# Only check that Numba (and NumPy, which it needs) are installed here; the
+# imports (~125ms) and kernel compilation are deferred to first use (see
+# _compiled), so importing the tagger stays cheap
+NUMBA_AVAILABLE = (importlib.util.find_spec("numba") is not None
+                   and importlib.util.find_spec("numpy") is not None)
+
+# Below this many amounts the Python path is faster than crossing into the
+# kernel (buffer conversion + first-call JIT compile)
+NUMBA_MIN_SPANS = 64
+
+
+def _parse_amounts_kernel(buf, starts, ends, out):
+    """
+    Parse amounts from a buffer of code points into integer cents
+
+    buf holds one code point per character, so span offsets are the same
+    character offsets the tagger produces. Each span starts at the '$'.
+    """
+    for i in range(starts.shape[0]):
+        value = 0
+        decimals = -1
+        for j in range(starts[i] + 1, ends[i]):
+            c = buf[j]
+            if c >= 48 and c <= 57:  # '0'-'9'
+                value = value * 10 + (c - 48)
+                if decimals >= 0:
+                    decimals += 1
+            elif c == 46:  # '.'
+                decimals = 0
+        # Scale to cents: "$12" -> 1200, "$12.3" -> 1230, "$12.34" -> 1234
+        if decimals < 0:
+            decimals = 0
+        for _ in range(decimals, 2):
+            value *= 10
+        out[i] = value
+
+
+# kernel -> its compiled version, filled in by _compiled
+_COMPILED_KERNELS = {}
+
+
+def _compiled(kernel):
+    """
+    Numba-compiled version of a kernel, importing Numba on first use
+
+    Falls back to the plain Python function (same results, much slower)
+    if Numba is installed but fails to import.
+    """
+    compiled = _COMPILED_KERNELS.get(kernel)
+    if compiled is None:
+        try:
+            from numba import njit  # deferred: heavy import
+            compiled = njit(cache=True)(kernel)
+        except ImportError:
+            compiled = kernel
+        _COMPILED_KERNELS[kernel] = compiled
+    return compiled
+
+
+def _parse_amount(amount_text: str) -> int:
+    """Parse a single "$1,234.56"-style amount into integer cents"""
+    digits = amount_text.lstrip('$').replace(',', '')
+    whole, _, cents = digits.partition('.')
+    return int(whole or 0) * 100 + int((cents + '00')[:2])
+
+
+def parse_amounts(text: str, spans: Sequence[Tuple[int, int]]) -> List[int]:
+    """
+    Parse the dollar amounts at the given spans of text into integer cents
+
+    Args:
+        text: Text the spans refer to
+        spans: (start, end) character offsets, each starting at '$'
+
+    Returns:
+        List of values in cents, in span order
+    """
+    if NUMBA_AVAILABLE and len(spans) >= NUMBA_MIN_SPANS:
+        import numpy as np
+        # UTF-32 gives one fixed-width code unit per character
+        buf = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        starts = np.fromiter((s for s, _ in spans), dtype=np.int64, count=len(spans))
+        ends = np.fromiter((e for _, e in spans), dtype=np.int64, count=len(spans))
+        out = np.empty(len(spans), dtype=np.int64)
+        _compiled(_parse_amounts_kernel)(buf, starts, ends, out)
+        return out.tolist()
+
+    return [_parse_amount(text[start:end]) for start, end in spans]
+
+
+def _select_intervals_kernel(weights, predecessors, best, keep):
+    """
+    Weighted interval scheduling over entities sorted by end position
+
+    predecessors[j] is how many entities end at or before entity j starts;
+    best is a zeroed table one longer than weights. keep[j] is set for
+    every entity in the heaviest non-overlapping set.
+    """
+    n = weights.shape[0]
+    for j in range(n):
+        take = weights[j] + best[predecessors[j]]
+        best[j + 1] = take if take > best[j] else best[j]
+    # Walk the table back: entity j - 1 was kept wherever it raised best[j]
+    j = n
+    while j > 0:
+        if best[j] != best[j - 1]:
+            keep[j - 1] = True
+            j = predecessors[j - 1]
+        else:
+            j -= 1
+
+
+def select_intervals_ready() -> bool:
+    """Whether select_intervals' kernel is already compiled (no first-call cost)"""
+    return _select_intervals_kernel in _COMPILED_KERNELS
+
+
+def select_intervals(weights, predecessors):
+    """
+    Weighted interval scheduling on NumPy arrays (requires Numba)
+
+    Args:
+        weights: int64 weight per entity, entities sorted by end position
+        predecessors: int64 count of entities compatible with each one
+
+    Returns:
+        Boolean mask of the entities to keep
+    """
+    import numpy as np
+    best = np.zeros(weights.shape[0] + 1, dtype=np.int64)
+    keep = np.zeros(weights.shape[0], dtype=np.bool_)
+    _compiled(_select_intervals_kernel)(weights, predecessors, best, keep)
+    return keep
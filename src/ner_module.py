@@ -5,22 +5,67 @@ Falls back gracefully if spaCy is not available
 """
 
 import re
-from typing import List, Optional
+import sys
+import os
+import json
+import shutil
+import hashlib
+import importlib.util
+import threading
+from pathlib import Path
+from typing import List, Optional, TYPE_CHECKING
 from dataclasses import dataclass
 
-# Try to import spaCy, but don't fail if it's not installed
-try:
-    import spacy
-    from spacy.language import Language
-    from spacy.tokens import Doc, Span
-    SPACY_AVAILABLE = True
-except ImportError:
-    SPACY_AVAILABLE = False
+from config import CACHE_DIR
+
+# Only check that spaCy is installed here; the import itself (which pulls in
+# thinc/numpy) is deferred to FinancialNER.__init__ so startup stays cheap
+SPACY_AVAILABLE = importlib.util.find_spec("spacy") is not None
+if not SPACY_AVAILABLE:
     print("   spaCy not available. NER features will be disabled.")
     print("   Install with: pip install spacy && python -m spacy download en_core_web_sm")
 
+if TYPE_CHECKING:
+    from spacy.language import Language
+    from spacy.tokens import Doc
+
+
+# Pipeline components FinancialNER never reads (it only consumes doc.ents).
+# Excluding them at load time skips loading their weights and running them per token.
+UNUSED_COMPONENTS = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+# Custom entity patterns for the financial domain (added via an EntityRuler)
+CUSTOM_PATTERNS = [
+    # Company patterns (various legal structures)
+    {"label": "ORG", "pattern": [{"TEXT": {"REGEX": r"[A-Z][a-z]+"}}, {"LOWER": "ltd"}, {"TEXT": "."}]},
+    {"label": "ORG", "pattern": [{"TEXT": {"REGEX": r"[A-Z][a-z]+"}}, {"LOWER": "inc"}, {"TEXT": "."}]},
+    {"label": "ORG", "pattern": [{"TEXT": {"REGEX": r"[A-Z][a-z]+"}}, {"LOWER": "corp"}, {"TEXT": "."}]},
+    
+    # Stock exchange symbols
+    {"label": "STOCK_SYMBOL", "pattern": [{"LOWER": "symbol"}, {"TEXT": {"REGEX": r'["\u201C]'}}, {"IS_UPPER": True, "LENGTH": {">=": 2, "<=": 5}}, {"TEXT": {"REGEX": r'["\u201D]'}}]},
+    
+    # Financial concepts (will be caught by dictionary but NER provides confidence)
+    {"label": "FINANCIAL_CONCEPT", "pattern": [{"LOWER": "working"}, {"LOWER": "capital"}, {"LOWER": "deficiency"}]},
+    {"label": "FINANCIAL_CONCEPT", "pattern": [{"LOWER": "accumulated"}, {"LOWER": "deficit"}]},
+]
+
+# Fully configured pipelines are saved here after the first build, so later
+# runs skip component exclusion and EntityRuler pattern compilation
+NLP_CACHE_DIR = CACHE_DIR / "nlp_financial"
 
-@dataclass
+# Characters not allowed in a cache entry name (model names may be paths)
+_UNSAFE_NAME_CHARS = re.compile(r"[^\w.-]")
+
+# Key under which the cached pipeline's meta stores its fingerprint (see
+# FinancialNER._pipeline_fingerprint)
+FINGERPRINT_META_KEY = "financial_fingerprint"
+
+
+# __slots__ instances (no per-object __dict__) where supported (Python 3.10+)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class NEREntity:
     """Represents an entity found by NER"""
     text: str
@@ -47,20 +92,121 @@ class FinancialNER:
             model_name: spaCy model to load
             use_ner: Whether to use NER (False = fallback to regex only)
         """
-        self.nlp: Optional[Language] = None
+        self.nlp: Optional["Language"] = None
         self.use_ner = use_ner and SPACY_AVAILABLE
         
         if self.use_ner:
             try:
-                self.nlp = spacy.load(model_name)
-                self._setup_custom_patterns()
+                import spacy  # deferred: heavy import, only needed for NER
+                fingerprint = self._pipeline_fingerprint(spacy, model_name)
+                self.nlp = self._load_cached_pipeline(spacy, model_name, fingerprint)
+                if self.nlp is None:
+                    self.nlp = spacy.load(model_name, exclude=UNUSED_COMPONENTS)
+                    self._remove_unused_tok2vec()
+                    self._setup_custom_patterns()
+                    self._save_cached_pipeline(model_name, fingerprint)
                 print(f"  Loaded spaCy model: {model_name}")
+            except ImportError as e:
+                print(f"   spaCy could not be imported ({e}). NER features will be disabled.")
+                self.use_ner = False
+                self.nlp = None
             except OSError:
                 print(f"  spaCy model '{model_name}' not found.")
                 print(f"   Download with: python -m spacy download {model_name}")
                 self.use_ner = False
                 self.nlp = None
     
+    @staticmethod
+    def _cache_path(model_name: str) -> Path:
+        """Directory holding the cached pipeline for a base model"""
+        # model_name may itself be a path; keep the cache entry inside NLP_CACHE_DIR
+        return NLP_CACHE_DIR / _UNSAFE_NAME_CHARS.sub("_", model_name)
+    
+    @staticmethod
+    def _pipeline_fingerprint(spacy, model_name: str) -> Optional[str]:
+        """
+        Fingerprint of everything a cached pipeline is built from
+        
+        Covers the custom patterns, the excluded components, the spaCy
+        version and the base model's name and version (read from its
+        meta.json without loading it), so editing the patterns or upgrading
+        spaCy or the model invalidates the cache.
+        
+        Returns:
+            Hex digest, or None if the base model's meta cannot be read
+            (the cache is then not used)
+        """
+        try:
+            if spacy.util.is_package(model_name):
+                base_path = spacy.util.get_package_path(model_name)
+            else:
+                base_path = Path(model_name)
+            meta = spacy.util.get_model_meta(base_path)
+        except (OSError, ValueError):
+            return None
+        
+        key = [CUSTOM_PATTERNS, UNUSED_COMPONENTS, spacy.__version__,
+               meta.get("name"), meta.get("version")]
+        return hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+    
+    def _load_cached_pipeline(self, spacy, model_name: str,
+                              fingerprint: Optional[str]) -> Optional["Language"]:
+        """
+        Load a previously saved, fully configured pipeline
+        
+        Returns:
+            The pipeline, or None if there is no usable cache entry
+        """
+        path = self._cache_path(model_name)
+        if fingerprint is None or not (path / "meta.json").exists():
+            return None
+        
+        try:
+            nlp = spacy.load(path)
+        except (OSError, ValueError):
+            return None  # unreadable/incompatible cache: rebuild it
+        
+        if nlp.meta.get(FINGERPRINT_META_KEY) != fingerprint:
+            return None
+        return nlp
+    
+    def _save_cached_pipeline(self, model_name: str, fingerprint: Optional[str]):
+        """
+        Save the configured pipeline for later runs (best effort)
+        
+        Written to a temporary directory first and renamed into place, so a
+        concurrent run never sees a half-written cache.
+        """
+        if not self.nlp or fingerprint is None:
+            return
+        
+        path = self._cache_path(model_name)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        self.nlp.meta[FINGERPRINT_META_KEY] = fingerprint
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.nlp.to_disk(tmp_path)
+            if path.exists():
+                shutil.rmtree(path)  # stale entry (fingerprint mismatch)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Read-only checkout or lost a race with another run: rebuild next time
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    
+    def _remove_unused_tok2vec(self):
+        """
+        Drop the shared tok2vec if no remaining component listens to it
+        
+        In en_core_web_sm the shared tok2vec only feeds tagger/parser (NER
+        has its own embedding layer), so it is dead weight once those are
+        excluded. Models whose NER listens to it keep it.
+        """
+        if not self.nlp or "tok2vec" not in self.nlp.pipe_names:
+            return
+        
+        if not self.nlp.get_pipe("tok2vec").listening_components:
+            self.nlp.remove_pipe("tok2vec")
+    
     def _setup_custom_patterns(self):
         """
         Add custom entity patterns for financial domain
@@ -74,22 +220,7 @@ class FinancialNER:
         else:
             ruler = self.nlp.get_pipe("entity_ruler")
         
-        # Custom patterns for financial entities
-        patterns = [
-            # Company patterns (various legal structures)
-            {"label": "ORG", "pattern": [{"TEXT": {"REGEX": r"[A-Z][a-z]+"}}, {"LOWER": "ltd"}, {"TEXT": "."}]},
-            {"label": "ORG", "pattern": [{"TEXT": {"REGEX": r"[A-Z][a-z]+"}}, {"LOWER": "inc"}, {"TEXT": "."}]},
-            {"label": "ORG", "pattern": [{"TEXT": {"REGEX": r"[A-Z][a-z]+"}}, {"LOWER": "corp"}, {"TEXT": "."}]},
-            
-            # Stock exchange symbols
-            {"label": "STOCK_SYMBOL", "pattern": [{"LOWER": "symbol"}, {"TEXT": {"REGEX": r'["\u201C]'}}, {"IS_UPPER": True, "LENGTH": {">=": 2, "<=": 5}}, {"TEXT": {"REGEX": r'["\u201D]'}}]},
-            
-            # Financial concepts (will be caught by dictionary but NER provides confidence)
-            {"label": "FINANCIAL_CONCEPT", "pattern": [{"LOWER": "working"}, {"LOWER": "capital"}, {"LOWER": "deficiency"}]},
-            {"label": "FINANCIAL_CONCEPT", "pattern": [{"LOWER": "accumulated"}, {"LOWER": "deficit"}]},
-        ]
-        
-        ruler.add_patterns(patterns)
+        ruler.add_patterns(CUSTOM_PATTERNS)
     
     def extract_entities(self, text: str) -> List[NEREntity]:
         """
@@ -104,7 +235,30 @@ class FinancialNER:
         if not self.use_ner or not self.nlp:
             return []
         
-        doc = self.nlp(text)
+        return self._doc_to_entities(self.nlp(text))
+    
+    def extract_entities_batch(self, texts: List[str], batch_size: int = 64) -> List[List[NEREntity]]:
+        """
+        Extract entities from many texts in a single nlp.pipe() call
+        
+        Batching lets spaCy amortize pipeline dispatch and tokenization
+        across paragraphs instead of paying it once per text.
+        
+        Args:
+            texts: Input texts to analyze
+            batch_size: Number of texts spaCy processes per batch
+            
+        Returns:
+            List of NEREntity lists, one per input text (same order)
+        """
+        if not self.use_ner or not self.nlp:
+            return [[] for _ in texts]
+        
+        return [self._doc_to_entities(doc)
+                for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=1)]
+    
+    def _doc_to_entities(self, doc: "Doc") -> List[NEREntity]:
+        """Convert a processed spaCy Doc to NEREntity objects"""
         entities = []
         
         for ent in doc.ents:
@@ -131,7 +285,20 @@ class FinancialNER:
             List of organization entities
         """
         entities = self.extract_entities(text)
-        return [e for e in entities if e.label_ == "ORG"]
+        return [e for e in entities if e.label == "ORG"]
+    
+    def extract_organizations_batch(self, texts: List[str]) -> List[List[NEREntity]]:
+        """
+        Extract organization entities from many texts (batched)
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            List of organization entity lists, one per input text
+        """
+        return [[e for e in entities if e.label == "ORG"]
+                for entities in self.extract_entities_batch(texts)]
     
     def extract_locations(self, text: str) -> List[NEREntity]:
         """
@@ -144,30 +311,52 @@ class FinancialNER:
             List of location entities
         """
         entities = self.extract_entities(text)
-        return [e for e in entities if e.label_ in ["GPE", "LOC"]]
+        return [e for e in entities if e.label in ["GPE", "LOC"]]
     
     def is_available(self) -> bool:
         """Check if NER is available and working"""
         return self.use_ner and self.nlp is not None
 
 
-# Singleton instance (lazy loaded)
+# Singleton instance (lazy loaded, guarded so a background preload and the
+# main thread never load the model twice)
 _ner_instance: Optional[FinancialNER] = None
+_ner_lock = threading.Lock()
 
 
 def get_ner() -> FinancialNER:
     """
     Get or create the NER singleton instance
     
+    Thread-safe: if a load is already in progress (e.g. via preload_ner),
+    waits for it instead of starting another one.
+    
     Returns:
         FinancialNER instance
     """
     global _ner_instance
     if _ner_instance is None:
-        _ner_instance = FinancialNER()
+        with _ner_lock:
+            if _ner_instance is None:
+                _ner_instance = FinancialNER()
     return _ner_instance
 
 
+def preload_ner() -> threading.Thread:
+    """
+    Start creating the NER singleton on a background daemon thread
+    
+    Model loading is independent of XML parsing, so callers can overlap
+    the two; the first get_ner() call afterwards waits for the load.
+    
+    Returns:
+        The started thread
+    """
+    thread = threading.Thread(target=get_ner, name="ner-preload", daemon=True)
+    thread.start()
+    return thread
+
+
 # ============================================================================
 # TESTING
 # ============================================================================
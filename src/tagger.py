@@ -8,22 +8,120 @@ HYBRID APPROACH:
 - Combines results with priority-based conflict resolution
 """
 
-import re
+import importlib.util
+import sys
+from bisect import bisect_right
 from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass
+from collections import Counter, OrderedDict
+
+# NumPy sorts large entity sets (falling back to sorted()). Only check that it
+# is installed here; it is imported on first use, as only large entity sets
+# need it
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
 from config import (
     Patterns, 
-    FINANCIAL_CONCEPTS, 
+    FINANCIAL_CONCEPTS_RE,
+    FINANCIAL_CONCEPTS_LOWER_RE,
+    FINANCIAL_CONCEPTS_AC,
+    FINANCIAL_CONCEPTS_HS,
     ENTITY_PRIORITIES, 
     TAG_IDS,
+    QUOTE_TABLE,
+    PATTERN_KINDS,
+    KIND_TO_TAG,
+    PRIORITY_BY_KIND,
+    ENTITY_PATTERNS_HS,
+    combined_entity_pattern,
+    combined_entity_pattern_re2,
+    RE2_AVAILABLE,
     SubsectionRules
 )
 
 # Import NER module (falls back gracefully if spaCy not available)
 from ner_module import get_ner, NEREntity
+from fast_numeric import parse_amounts, select_intervals, select_intervals_ready, NUMBA_AVAILABLE
+
+
+def _is_word_char(char: str) -> bool:
+    """Same definition of a word character as regex \\w"""
+    return char.isalnum() or char == '_'
+
+
+def _is_word_bounded(text: str, start: int, end: int) -> bool:
+    """Check that text[start:end] has regex \\b boundaries at both ends"""
+    if start > 0 and _is_word_char(text[start - 1]) == _is_word_char(text[start]):
+        return False
+    if end < len(text) and _is_word_char(text[end - 1]) == _is_word_char(text[end]):
+        return False
+    return True
+
+
+def _can_scan_lowered(text: str, lowered: str) -> bool:
+    """
+    Check that lowercase ASCII patterns matched case-sensitively against
+    lowered find exactly what re.IGNORECASE finds in text, at the same offsets
+    
+    str.lower() can change the length (capital dotted I), and re.IGNORECASE
+    also folds dotless i and long s onto ASCII letters.
+    """
+    return (len(lowered) == len(text)
+            and '\u0131' not in lowered and '\u017f' not in lowered)
+
+
+# Paragraphs this short are not sent to NER unless force_ner is set
+NER_MIN_CHARS = 80
+
+# Below this many entities sorted() beats building NumPy arrays
+NUMPY_MIN_ENTITIES = 256
+
+# With the compiled selection kernel the arrays pay off much sooner
+# (measured crossover between 32 and 64 entities, with the kernel warm)
+NUMBA_MIN_ENTITIES = 48
+
+# The first kernel call imports Numba and compiles or loads the kernel
+# (~250ms, against ~1.4us per entity for the Python table), so below this
+# many entities the kernel is only used once something has compiled it
+NUMBA_COMPILE_MIN_ENTITIES = 200_000
+
+# Overlap weights above this do not fit the int64 arrays; such (very large)
+# entity sets stay on the pure Python path, whose ints do not overflow
+ARRAY_WEIGHT_LIMIT = 2 ** 62
+
+# Distinct paragraph texts whose entities extract_entities remembers
+ENTITY_CACHE_SIZE = 4096
+
+
+def _priority_bases(level_counts: Dict[int, int], total_length: int):
+    """
+    Overlap weight base for each priority, for _remove_overlaps
+    
+    Each base exceeds the combined weight of every lower-priority entity
+    plus all span lengths, so one entity outweighs any set of lower-priority
+    ones, and within a priority more entities outweigh longer ones.
+    
+    Returns:
+        tuple: (dict of priority -> base, upper bound on any total weight)
+    """
+    bases = {}
+    bound = total_length
+    for priority in sorted(level_counts):
+        bases[priority] = bound + 1
+        bound += level_counts[priority] * (bound + 1)
+    return bases, bound
 
 
-@dataclass
+# __slots__ instances (no per-object __dict__) where supported (Python 3.10+)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+# Frozen because extract_entities hands the same cached instances to every
+# caller for a repeated text. That makes construction slower (fields are set
+# through object.__setattr__), measured at about 4% of a whole document.
+# Not a NamedTuple: its instances are larger. Per-match loops construct it
+# positionally, which skips keyword argument binding.
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class Entity:
     """Represents a tagged entity in the text"""
     start: int
@@ -36,6 +134,12 @@ class Entity:
         return f"Entity({self.text!r}, {self.tag_id}, pos={self.start}-{self.end})"
 
 
+# Tag and priority shared by every financial concept hit
+_CONCEPT_TAG = TAG_IDS['financial_concept']
+_CONCEPT_PRIORITY = ENTITY_PRIORITIES['Financial_Concept_Placeholder']
+
+
+
 class FinancialNoteTagger:
     """
     Main tagger class for extracting and tagging entities in financial notes
@@ -47,18 +151,22 @@ class FinancialNoteTagger:
     4. Priority-based conflict resolution
     """
     
-    def __init__(self, use_ner: bool = True):
+    def __init__(self, use_ner: bool = True, force_ner: bool = False):
         """
         Initialize tagger
         
         Args:
             use_ner: Whether to use NER for entity extraction (True = hybrid mode)
+            force_ner: Run NER on every paragraph, even when the regex already
+                found the company name or the paragraph is short (recall-oriented
+                offline passes)
         """
         self.patterns = Patterns()
         self.use_ner = use_ner
+        self.force_ner = force_ner
         
-        # Initialize NER module (lazy loaded)
-        self.ner = get_ner() if use_ner else None
+        # NER module is resolved on first use (see the ner property)
+        self._ner = None
         
         # Track extraction statistics
         self.stats = {
@@ -67,7 +175,75 @@ class FinancialNoteTagger:
             'dictionary_extractions': 0,
         }
         
-    def extract_entities(self, text: str) -> List[Entity]:
+        # LRU memo: text -> [entities, stats counted while extracting them,
+        # tag_paragraph output or None until first asked for]
+        self._entity_cache: 'OrderedDict[str, list]' = OrderedDict()
+        
+    @property
+    def ner(self):
+        """
+        NER singleton, fetched on first access
+        
+        Constructing the tagger therefore never blocks on spaCy model
+        loading, which may still be running on a preload thread.
+        """
+        if self._ner is None and self.use_ner:
+            self._ner = get_ner()
+        return self._ner
+    
+    def clear_cache(self) -> None:
+        """
+        Forget memoized results (entities per text and header checks)
+        
+        The next document is then extracted cold, as when benchmarking one
+        document repeatedly.
+        """
+        self._entity_cache.clear()
+        SubsectionRules.clear_cache()
+    
+    def extract_entities(self, text: str,
+                         ner_orgs: Optional[List[NEREntity]] = None) -> List[Entity]:
+        """
+        Extract all entities from a paragraph of text (see _extract_entities_uncached)
+        
+        Results are memoized per text (up to ENTITY_CACHE_SIZE texts), so
+        repeated boilerplate paragraphs are extracted once. A cache hit
+        still adds that text's extraction counts to the stats, and returns a
+        new list of the same (frozen) Entity objects.
+        
+        ner_orgs: organizations already found by NER for this text (see
+        extract_entities_batch); when None, NER runs on the text itself
+        
+        Section headers ("1. NATURE OF OPERATIONS") are never tagged, so they
+        (and empty or whitespace-only paragraphs) return no entities without
+        running any extraction layer.
+        """
+        if self._skips_extraction(text):
+            return []
+        
+        cached = self._entity_cache.get(text)
+        if cached is not None:
+            self._entity_cache.move_to_end(text)
+            entities, counts, _ = cached
+            for key, count in counts.items():
+                self.stats[key] += count
+            return list(entities)
+        
+        before = self.stats.copy()
+        entities = self._extract_entities_uncached(text, ner_orgs)
+        
+        self._entity_cache[text] = [
+            tuple(entities),
+            {key: self.stats[key] - count for key, count in before.items()},
+            None
+        ]
+        if len(self._entity_cache) > ENTITY_CACHE_SIZE:
+            self._entity_cache.popitem(last=False)
+        
+        return entities
+    
+    def _extract_entities_uncached(self, text: str,
+                                   ner_orgs: Optional[List[NEREntity]] = None) -> List[Entity]:
         """
         Extract all entities from a paragraph of text using HYBRID approach
         
@@ -78,43 +254,49 @@ class FinancialNoteTagger:
         4. Dictionary matching for financial concepts
         5. General date patterns
         
-        Returns a list of Entity objects with overlaps resolved
+        Returns a list of Entity objects with overlaps resolved, in position order
+        
+        ner_orgs: organizations already found by NER for this text (see
+        extract_entities_batch); when None, NER runs on the text itself
         """
         entities = []
         
+        # Lowercased once for the case-insensitive scans (layers 1 and 3)
+        lowered = text.lower()
+        
         # Layer 1: High-priority, context-specific entities (REGEX)
-        entities.extend(self._extract_incorporation_dates(text))
-        entities.extend(self._extract_addresses(text))
-        entities.extend(self._extract_trading_symbols(text))
+        entities.extend(self._extract_incorporation_dates(text, lowered))
         
         # Layer 1.5: Company names - HYBRID (NER + Regex fallback)
-        entities.extend(self._extract_company_names_hybrid(text))
+        entities.extend(self._extract_company_names_hybrid(text, ner_orgs))
         
-        # Layer 2: Financial amounts (REGEX)
-        entities.extend(self._extract_amounts(text))
+        # Layers 2 + 4: Addresses, symbols, amounts and general dates
+        # (REGEX - single fused scan)
+        entities.extend(self._extract_pattern_entities(text))
         
         # Layer 3: Financial concepts (DICTIONARY)
-        entities.extend(self._extract_financial_concepts(text))
-        
-        # Layer 4: General dates (REGEX - lowest priority)
-        entities.extend(self._extract_dates(text))
-        
-        # Remove overlapping entities (keep higher priority ones)
-        entities = self._remove_overlaps(entities)
-        
-        # Sort by position for proper tagging
-        entities.sort(key=lambda e: e.start)
+        entities.extend(self._extract_financial_concepts(text, lowered))
         
-        return entities
+        # Remove overlapping entities (keep higher priority ones); the result
+        # is already in position order, as tagging needs
+        return self._remove_overlaps(entities)
     
-    def _extract_incorporation_dates(self, text: str) -> List[Entity]:
-        """Extract incorporation date with context"""
+    def _extract_incorporation_dates(self, text: str,
+                                     lowered: Optional[str] = None) -> List[Entity]:
+        """Extract incorporation date with context (lowered: text.lower(), if already computed)"""
         entities = []
-        match = re.search(self.patterns.INCORPORATION_CONTEXT, text, re.IGNORECASE)
+        if lowered is None:
+            lowered = text.lower()
+        
+        # Case-sensitive scan of the lowered text where offsets map 1:1
+        if _can_scan_lowered(text, lowered):
+            match = self.patterns.INCORPORATION_CONTEXT_LOWER.search(lowered)
+        else:
+            match = self.patterns.INCORPORATION_CONTEXT.search(text)
         if match:
-            date_text = match.group(1)
             start = match.start(1)
             end = match.end(1)
+            date_text = text[start:end]
             entities.append(Entity(
                 start=start,
                 end=end,
@@ -124,67 +306,236 @@ class FinancialNoteTagger:
             ))
         return entities
     
-    def _extract_addresses(self, text: str) -> List[Entity]:
-        """Extract registered office addresses"""
+    def _extract_pattern_entities(self, text: str,
+                                  kinds: Optional[Tuple[str, ...]] = None) -> List[Entity]:
+        """
+        Extract addresses, trading symbols, amounts and dates in one pass
+        
+        Uses the fused named-group alternation; match.lastgroup tells which
+        entity type matched. Matches are non-overlapping and, at the same
+        position, the higher priority type wins.
+        
+        kinds: only scan for these ENTITY_PATTERNS keys (in ENTITY_PATTERNS
+        order); a single kind behaves exactly like its own pattern
+        """
+        # A lone anchored kind: the str.find scan beats the Hyperscan
+        # prefilter on its own
+        if kinds is not None and len(kinds) == 1 and kinds[0] in self.patterns.ENTITY_ANCHORS:
+            return self._extract_anchored_entities(text, kinds[0])
+        
         entities = []
-        for match in re.finditer(self.patterns.ADDRESS_PATTERN, text):
+        text = text.translate(QUOTE_TABLE)
+        if kinds is None:
+            pattern = self.patterns.COMBINED_ENTITY_PATTERN
+        else:
+            pattern = combined_entity_pattern(kinds)
+        
+        # Hyperscan prefilter: one scan tells which entity types occur, so
+        # re only tries those alternatives (ASCII only, see config)
+        if ENTITY_PATTERNS_HS is not None and text.isascii():
+            present = self._present_pattern_kinds(text)
+            if kinds is not None:
+                present = tuple(kind for kind in present if kind in kinds)
+            if not present:
+                return entities
+            if len(present) == 1 and present[0] in self.patterns.ENTITY_ANCHORS:
+                return self._extract_anchored_entities(text, present[0])
+            kinds = present
+            pattern = combined_entity_pattern(present)
+        
+        # RE2 runs the same alternation without backtracking (ASCII only,
+        # see config)
+        if RE2_AVAILABLE and text.isascii():
+            kinds = kinds or tuple(self.patterns.ENTITY_PATTERNS)
+            re2_pattern = combined_entity_pattern_re2(kinds)
+            if re2_pattern is not None:
+                return self._extract_pattern_entities_re2(text, re2_pattern, kinds)
+        
+        for match in pattern.finditer(text):
+            group = match.lastgroup
+            kind = PATTERN_KINDS[group]
+            # Trading symbols tag only the symbol, not the surrounding context
+            if group == 'trading_symbol':
+                group = 'symbol'
             entities.append(Entity(
-                start=match.start(),
-                end=match.end(),
-                tag_id=TAG_IDS['address'],
-                text=match.group(),
-                priority=ENTITY_PRIORITIES['AddressOfRegisteredOfficeOfEntity']
+                match.start(group), match.end(group), KIND_TO_TAG[kind],
+                match.group(group), PRIORITY_BY_KIND[kind]
             ))
         return entities
     
-    def _extract_trading_symbols(self, text: str) -> List[Entity]:
-        """Extract trading symbols"""
+    @staticmethod
+    def _extract_pattern_entities_re2(text: str, pattern, kinds: Tuple[str, ...]) -> List[Entity]:
+        """
+        The fused scan of _extract_pattern_entities on RE2, for ASCII text
+        
+        RE2's Python wrapper maps byte offsets back to str offsets and finds
+        lastgroup with Python loops on every match; scanning the ASCII bytes
+        (whose offsets are the character offsets) and taking the first kind
+        group that took part avoids both.
+        """
         entities = []
-        for match in re.finditer(self.patterns.TRADING_SYMBOL_PATTERN, text):
-            symbol = match.group(1)
-            entities.append(Entity(
-                start=match.start(1),
-                end=match.end(1),
-                tag_id=TAG_IDS['trading_symbol'],
-                text=symbol,
-                priority=ENTITY_PRIORITIES['EntityPrimaryTradingSymbol']
+        groupindex = pattern.groupindex
+        groups = []
+        for kind in kinds:
+            entity_kind = PATTERN_KINDS[kind]
+            groups.append((
+                groupindex[kind],
+                # Trading symbols tag only the symbol, not the surrounding context
+                groupindex['symbol' if kind == 'trading_symbol' else kind],
+                KIND_TO_TAG[entity_kind], PRIORITY_BY_KIND[entity_kind]
             ))
+        
+        for match in pattern.finditer(text.encode('ascii')):
+            for group, entity_group, tag_id, priority in groups:
+                if match.start(group) >= 0:
+                    start, end = match.span(entity_group)
+                    entities.append(Entity(start, end, tag_id, text[start:end], priority))
+                    break
         return entities
     
-    def _extract_company_names_hybrid(self, text: str) -> List[Entity]:
+    def _extract_anchored_entities(self, text: str, kind: str) -> List[Entity]:
+        """
+        Extract one ENTITY_ANCHORS kind by trying its pattern only at its anchor
+        
+        Every match starts with the anchor literal ('$', "under the
+        symbol"), so str.find skips straight to the candidates; on long text
+        with few hits this beats both re's and RE2's full scans (and a NumPy
+        byte compare, which has to encode the text first). Same matches as
+        the kind's own pattern.
+        """
+        entities = []
+        anchor = self.patterns.ENTITY_ANCHORS[kind]
+        pos = text.find(anchor)
+        if pos < 0:
+            return entities
+        
+        # Quote folding is 1:1, so anchor offsets carry over
+        text = text.translate(QUOTE_TABLE)
+        match_at = self.patterns.ENTITY_PATTERNS[kind].match
+        entity_kind = PATTERN_KINDS[kind]
+        tag_id, priority = KIND_TO_TAG[entity_kind], PRIORITY_BY_KIND[entity_kind]
+        # Trading symbols tag only the symbol, not the surrounding context
+        group = 'symbol' if kind == 'trading_symbol' else 0
+        while pos >= 0:
+            match = match_at(text, pos)
+            if match:
+                pos = match.end()
+                entities.append(Entity(
+                    match.start(group), match.end(group), tag_id, match.group(group), priority
+                ))
+            else:
+                pos += 1
+            pos = text.find(anchor, pos)
+        return entities
+    
+    def _present_pattern_kinds(self, text: str) -> Tuple[str, ...]:
+        """ENTITY_PATTERNS keys (in priority order) with a match somewhere in ASCII text"""
+        found = set()
+        
+        def on_match(pattern_id, start, end, flags, context):
+            found.add(pattern_id)
+        
+        ENTITY_PATTERNS_HS.scan(text.encode('ascii'), match_event_handler=on_match)
+        return tuple(kind for i, kind in enumerate(self.patterns.ENTITY_PATTERNS) if i in found)
+    
+    def _extract_addresses(self, text: str) -> List[Entity]:
+        """Extract registered office addresses"""
+        return self._extract_pattern_entities(text, ('address',))
+    
+    def _extract_trading_symbols(self, text: str) -> List[Entity]:
+        """Extract trading symbols"""
+        return self._extract_pattern_entities(text, ('trading_symbol',))
+    
+    def extract_entities_batch(self, texts: List[str]) -> List[List[Entity]]:
         """
-        HYBRID: Extract company names using NER + regex fallback
+        Extract entities from many paragraphs, running NER once for all
+        
+        spaCy processes every text in a single nlp.pipe() call instead of
+        one call per paragraph; the rest of extraction is per text.
+        
+        Args:
+            texts: Paragraph texts
+            
+        Returns:
+            List of entity lists, one per input text (same order)
+        """
+        orgs_per_text = [None] * len(texts)
+        
+        # Only paragraphs that will actually consult NER go through spaCy,
+        # once per distinct text not already in the entity cache (headers
+        # never reach extraction)
+        if self.use_ner and self.ner and self.ner.is_available():
+            seen = set()
+            indexes = []
+            for i, text in enumerate(texts):
+                if (text not in seen and text not in self._entity_cache
+                        and not self._skips_extraction(text) and self._needs_ner(text)):
+                    indexes.append(i)
+                seen.add(text)
+            batch = self.ner.extract_organizations_batch([texts[i] for i in indexes])
+            for i, orgs in zip(indexes, batch):
+                orgs_per_text[i] = orgs
+        
+        return [self.extract_entities(text, orgs) for text, orgs in zip(texts, orgs_per_text)]
+    
+    @staticmethod
+    def _skips_extraction(text: str) -> bool:
+        """Whether text is a header or blank, and so has no entities"""
+        return not text or text.isspace() or SubsectionRules.is_header(text)
+    
+    def _needs_ner(self, text: str) -> bool:
+        """
+        Whether company-name extraction should consult NER for this text
+        
+        The leading-company regex covers the common case; NER is only worth
+        its cost for longer paragraphs the regex found nothing in.
+        """
+        if self.force_ner:
+            return True
+        return len(text) > NER_MIN_CHARS and not self.patterns.LEADING_COMPANY_PATTERN.match(text)
+    
+    def _extract_company_names_hybrid(self, text: str,
+                                      ner_orgs: Optional[List[NEREntity]] = None) -> List[Entity]:
+        """
+        HYBRID: Extract company names using regex, with NER as the fallback
         
         Strategy:
-        1. Try NER first (if available) - better at handling variations
-        2. Fallback to regex for specific known patterns
-        3. Combine and deduplicate results
+        1. Try the cheap regex first (company name at paragraph start)
+        2. Only if it finds nothing, and the paragraph is long enough, run
+           NER - better at handling variations (always with force_ner)
+        3. Combine results; overlaps are resolved later
         
         Args:
             text: Input text
+            ner_orgs: Organizations already found by NER (optional)
             
         Returns:
             List of company name entities
         """
         entities = []
         
-        # Try NER first (more sophisticated)
-        if self.use_ner and self.ner and self.ner.is_available():
-            ner_entities = self._extract_company_names_ner(text)
+        # Regex first (fast, deterministic, covers the common case)
+        regex_entities = self._extract_company_names_regex(text)
+        if regex_entities:
+            self.stats['regex_extractions'] += len(regex_entities)
+        
+        # NER only when it can add something (lazy: skips spaCy entirely);
+        # same test as _needs_ner, reusing the regex result instead of
+        # matching LEADING_COMPANY_PATTERN again
+        needs_ner = self.force_ner or (len(text) > NER_MIN_CHARS and not regex_entities)
+        if needs_ner and self.use_ner and self.ner and self.ner.is_available():
+            ner_entities = self._extract_company_names_ner(text, ner_orgs)
             entities.extend(ner_entities)
             if ner_entities:
                 self.stats['ner_extractions'] += len(ner_entities)
         
-        # Always try regex as well (catches specific patterns NER might miss)
-        regex_entities = self._extract_company_names_regex(text)
         entities.extend(regex_entities)
-        if regex_entities:
-            self.stats['regex_extractions'] += len(regex_entities)
         
         # Note: Overlaps will be resolved in _remove_overlaps()
         return entities
     
-    def _extract_company_names_ner(self, text: str) -> List[Entity]:
+    def _extract_company_names_ner(self, text: str,
+                                   orgs: Optional[List[NEREntity]] = None) -> List[Entity]:
         """
         Extract company names using NER (spaCy)
         
@@ -195,8 +546,9 @@ class FinancialNoteTagger:
         if not self.ner or not self.ner.is_available():
             return entities
         
-        # Get organizations from NER
-        orgs = self.ner.extract_organizations(text)
+        # Get organizations from NER (unless a batch call already did)
+        if orgs is None:
+            orgs = self.ner.extract_organizations(text)
         
         for org in orgs:
             # Filter for company-like organizations (have Ltd., Inc., Corp., etc.)
@@ -221,7 +573,7 @@ class FinancialNoteTagger:
         
         # Look for specific pattern at start of paragraph
         # "BestCo Ltd. (formerly GoodCo Ltd.)"
-        match = re.match(r'^([A-Z][a-zA-Z]+\s+Ltd\.)', text)
+        match = self.patterns.LEADING_COMPANY_PATTERN.match(text)
         if match:
             entities.append(Entity(
                 start=match.start(1),
@@ -242,89 +594,186 @@ class FinancialNoteTagger:
     
     def _extract_amounts(self, text: str) -> List[Entity]:
         """Extract financial amounts like $19,821"""
-        entities = []
-        for match in re.finditer(self.patterns.AMOUNT_PATTERN, text):
-            entities.append(Entity(
-                start=match.start(),
-                end=match.end(),
-                tag_id=TAG_IDS['financial_amount'],
-                text=match.group(),
-                priority=ENTITY_PRIORITIES['Financial_Amount_Placeholder']
-            ))
+        return self._extract_pattern_entities(text, ('financial_amount',))
+    
+    def _extract_financial_concepts(self, text: str,
+                                    lowered: Optional[str] = None) -> List[Entity]:
+        """Extract financial concepts from dictionary (lowered: text.lower(), if already computed)"""
+        # Hyperscan byte offsets are character offsets only for ASCII text
+        if FINANCIAL_CONCEPTS_HS is not None and text.isascii():
+            entities = self._extract_financial_concepts_hs(text)
+        else:
+            if lowered is None:
+                lowered = text.lower()
+            
+            # Aho-Corasick needs offsets in the lowercased text to map 1:1
+            if FINANCIAL_CONCEPTS_AC is not None and _can_scan_lowered(text, lowered):
+                entities = self._extract_financial_concepts_ac(text, lowered)
+            else:
+                entities = self._extract_financial_concepts_regex(text, lowered)
+        
+        if entities:
+            self.stats['dictionary_extractions'] += len(entities)
+        
         return entities
     
-    def _extract_financial_concepts(self, text: str) -> List[Entity]:
-        """Extract financial concepts from dictionary"""
+    def _extract_financial_concepts_hs(self, text: str) -> List[Entity]:
+        """
+        Extract financial concepts with the Hyperscan literal database
+        
+        Single caseless scan of the (ASCII) text; hits are kept only on word
+        boundaries, matching the regex path's \\b...\\b semantics.
+        """
         entities = []
         
-        for concept, tag_id in FINANCIAL_CONCEPTS.items():
-            # Use word boundaries and case-insensitive matching
-            pattern = r'\b' + re.escape(concept) + r'\b'
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                entities.append(Entity(
-                    start=match.start(),
-                    end=match.end(),
-                    tag_id=TAG_IDS['financial_concept'],
-                    text=match.group(),
-                    priority=ENTITY_PRIORITIES['Financial_Concept_Placeholder']
-                ))
+        def on_match(concept_id, start, end, flags, context):
+            if _is_word_bounded(text, start, end):
+                entities.append(Entity(start, end, _CONCEPT_TAG, text[start:end], _CONCEPT_PRIORITY))
         
-        if entities:
-            self.stats['dictionary_extractions'] += len(entities)
+        FINANCIAL_CONCEPTS_HS.scan(text.encode('ascii'), match_event_handler=on_match)
+        return entities
+    
+    def _extract_financial_concepts_ac(self, text: str, lowered: str) -> List[Entity]:
+        """
+        Extract financial concepts with the Aho-Corasick automaton
+        
+        Single scan of the lowercased text; hits are kept only on word
+        boundaries, matching the regex path's \\b...\\b semantics.
+        """
+        entities = []
+        
+        for end, length in FINANCIAL_CONCEPTS_AC.iter(lowered):
+            end += 1
+            start = end - length
+            if _is_word_bounded(text, start, end):
+                entities.append(Entity(start, end, _CONCEPT_TAG, text[start:end], _CONCEPT_PRIORITY))
         
         return entities
     
-    def _extract_dates(self, text: str) -> List[Entity]:
-        """Extract dates - most general, lowest priority"""
+    def _extract_financial_concepts_regex(self, text: str,
+                                          lowered: Optional[str] = None) -> List[Entity]:
+        """Extract financial concepts with a single scan of the concept alternation (fallback)"""
         entities = []
         
-        for pattern in self.patterns.DATE_PATTERNS:
-            for match in re.finditer(pattern, text):
-                entities.append(Entity(
-                    start=match.start(),
-                    end=match.end(),
-                    tag_id=TAG_IDS['date'],
-                    text=match.group(),
-                    priority=ENTITY_PRIORITIES['Date_Placeholder']
-                ))
+        if FINANCIAL_CONCEPTS_RE is None:
+            return entities
+        
+        # Word boundaries and case-insensitive matching; case-sensitive over
+        # the lowered text when its offsets map 1:1
+        if lowered is not None and _can_scan_lowered(text, lowered):
+            matches = FINANCIAL_CONCEPTS_LOWER_RE.finditer(lowered)
+        else:
+            matches = FINANCIAL_CONCEPTS_RE.finditer(text)
+        
+        for match in matches:
+            start, end = match.span()
+            entities.append(Entity(start, end, _CONCEPT_TAG, text[start:end], _CONCEPT_PRIORITY))
         
         return entities
     
+    def _extract_dates(self, text: str) -> List[Entity]:
+        """Extract dates - most general, lowest priority"""
+        return self._extract_pattern_entities(text, ('date',))
+    
     def _remove_overlaps(self, entities: List[Entity]) -> List[Entity]:
         """
-        Remove overlapping entities, keeping higher priority ones
-        If same priority, keep longer match
+        Remove overlapping entities with weighted interval scheduling
+        
+        Priority is strictly dominant: the kept (non-overlapping) set has the
+        most entities of the highest priority, then of the next one down, and
+        so on, with total length only breaking ties. So one high-priority
+        entity wins over any number of lower-priority ones it overlaps. Each
+        entity weighs its priority's base (see _priority_bases) plus its
+        length, and the kept set has the highest total weight. Returned in
+        position order.
         """
         if not entities:
             return []
         
-        # Sort by start position, then priority (descending), then length (descending)
-        sorted_entities = sorted(
-            entities, 
-            key=lambda e: (e.start, -e.priority, -(e.end - e.start))
+        # Sort by end position; predecessors[j] is how many entities end at
+        # or before ordered[j] starts (the ones compatible with it)
+        n = len(entities)
+        use_kernel = NUMBA_AVAILABLE and (
+            n >= NUMBA_COMPILE_MIN_ENTITIES
+            or (n >= NUMBA_MIN_ENTITIES and select_intervals_ready())
         )
-        
+        arrays = None
+        if NUMPY_AVAILABLE and (use_kernel or n >= NUMPY_MIN_ENTITIES):
+            arrays = self._overlap_arrays_numpy(entities)
+        if arrays is not None:
+            order, predecessors, weights = arrays
+            if use_kernel:
+                # Table and walk-back in the compiled kernel
+                return [entities[i] for i in order[select_intervals(weights, predecessors)].tolist()]
+            ordered = [entities[i] for i in order.tolist()]
+            predecessors = predecessors.tolist()
+            weights = weights.tolist()
+        else:
+            ordered = sorted(entities, key=lambda e: (e.end, e.start, -e.priority))
+            ends = [e.end for e in ordered]
+            predecessors = [bisect_right(ends, e.start, 0, j) for j, e in enumerate(ordered)]
+            total_length = sum(ends) - sum(e.start for e in ordered)
+            bases, _ = _priority_bases(Counter(e.priority for e in ordered), total_length)
+            weights = [bases[e.priority] + (e.end - e.start) for e in ordered]
+        
+        # best[j]: highest total weight using only the first j entities
+        best = [0] * (len(ordered) + 1)
+        for j, entity in enumerate(ordered):
+            take = weights[j] + best[predecessors[j]]
+            best[j + 1] = take if take > best[j] else best[j]
+        
+        # Walk the table back: entity j - 1 was kept wherever it raised best[j]
         result = []
-        last_end = -1
-        
-        for entity in sorted_entities:
-            # Check if this entity overlaps with the last accepted one
-            if entity.start >= last_end:
-                result.append(entity)
-                last_end = entity.end
+        j = len(ordered)
+        while j > 0:
+            if best[j] != best[j - 1]:
+                result.append(ordered[j - 1])
+                j = predecessors[j - 1]
+            else:
+                j -= 1
         
+        result.reverse()
         return result
     
+    @staticmethod
+    def _overlap_arrays_numpy(entities: List[Entity]):
+        """
+        End order, predecessor counts and weights for _remove_overlaps
+        
+        Same ordering as the sorted() path: lexsort is stable and its last
+        key is the primary one. Predecessors and weights are in that order.
+        
+        Returns None when the weights could overflow int64.
+        """
+        import numpy as np  # deferred: see NUMPY_AVAILABLE
+        n = len(entities)
+        starts = np.fromiter((e.start for e in entities), dtype=np.int64, count=n)
+        ends = np.fromiter((e.end for e in entities), dtype=np.int64, count=n)
+        priorities = np.fromiter((e.priority for e in entities), dtype=np.int64, count=n)
+        order = np.lexsort((-priorities, starts, ends))
+        starts, ends, priorities = starts[order], ends[order], priorities[order]
+        predecessors = np.minimum(np.searchsorted(ends, starts, side='right'), np.arange(n))
+        lengths = ends - starts
+        levels, level_index, level_counts = np.unique(priorities, return_inverse=True, return_counts=True)
+        bases, bound = _priority_bases(dict(zip(levels.tolist(), level_counts.tolist())), int(lengths.sum()))
+        if bound >= ARRAY_WEIGHT_LIMIT:
+            return None
+        weights = np.array([bases[p] for p in levels.tolist()], dtype=np.int64)[level_index] + lengths
+        return order, predecessors, weights
+    
     def tag_text(self, text: str, entities: List[Entity]) -> str:
         """
         Apply XML tags to text based on extracted entities
+        
+        entities must be non-overlapping and in position order, as returned
+        by extract_entities.
         """
         if not entities:
             return text
         
-        # Sort entities by position
-        entities = sorted(entities, key=lambda e: e.start)
-        
+        # One f-string per entity, joined once: measured faster than writing
+        # the pieces to an io.StringIO. The XML writers do not go through this
+        # string at all (see build_paragraph_element).
         result = []
         last_pos = 0
         
@@ -342,13 +791,58 @@ class FinancialNoteTagger:
         
         return ''.join(result)
     
+    def build_paragraph_element(self, para_elem, text: str, entities: List[Entity]):
+        """
+        Fill an empty paragraph element with text and <Tag> children
+        
+        Builds the same content as tag_text(text, entities) describes, but
+        directly as elements, without the intermediate markup string.
+        Works with both ElementTree and lxml elements.
+        
+        Args:
+            para_elem: Element to fill (text and children)
+            text: Paragraph text
+            entities: Non-overlapping entities for text, in position order
+                (as returned by extract_entities)
+        """
+        # Parsing the escaped tag_text() markup with lxml.etree.fromstring
+        # measured only ~10% faster than these appends, and a re-parse turns
+        # a literal '\r' into '\n', so elements are built directly
+        para_elem.text = text[:entities[0].start] if entities else text
+        
+        tag_elem = None
+        last_pos = 0
+        
+        for entity in entities:
+            # Untagged text between entities is the previous tag's tail
+            if tag_elem is not None:
+                tag_elem.tail = text[last_pos:entity.start]
+            
+            tag_elem = para_elem.makeelement('Tag', {'id': entity.tag_id})
+            tag_elem.text = entity.text
+            para_elem.append(tag_elem)
+            
+            last_pos = entity.end
+        
+        # Remaining text after last entity
+        if tag_elem is not None:
+            tag_elem.tail = text[last_pos:]
+    
     def tag_paragraph(self, text: str) -> str:
         """
         Main method to tag a single paragraph
+        
+        The tagged string is kept with the text's entity cache entry, so a
+        repeated paragraph is tagged once (its stats still count each time).
         """
         entities = self.extract_entities(text)
-        tagged_text = self.tag_text(text, entities)
-        return tagged_text
+        cached = self._entity_cache.get(text)
+        if cached is None:
+            # Headers and blank paragraphs are not cached (and not tagged)
+            return self.tag_text(text, entities)
+        if cached[2] is None:
+            cached[2] = self.tag_text(text, entities)
+        return cached[2]
     
     def detect_subsections(self, paragraphs: List[Dict]) -> List[Dict]:
         """
@@ -381,9 +875,11 @@ class FinancialNoteTagger:
             else:
                 # Determine which subsection this belongs to based on content
                 # Check if this paragraph should start a new "going concern" section
+                # (lowercased once; substring tests beat a regex search here)
+                lowered = text.lower()
                 should_start_going_concern = (
-                    'going concern' in text.lower() or
-                    'material uncertainty' in text.lower() or
+                    'going concern' in lowered or
+                    'material uncertainty' in lowered or
                     'These consolidated financial statements' in text
                 )
                 
@@ -412,6 +908,23 @@ class FinancialNoteTagger:
         
         return subsections
 
+    def get_amount_values(self, text: str, entities: List[Entity]) -> List[int]:
+        """
+        Normalize the financial amounts among extracted entities
+        
+        Args:
+            text: Text the entities were extracted from
+            entities: Entities returned by extract_entities
+            
+        Returns:
+            Amount values in cents, in entity order
+        """
+        spans = [
+            (e.start, e.end) for e in entities
+            if e.tag_id == TAG_IDS['financial_amount']
+        ]
+        return parse_amounts(text, spans)
+
     def get_extraction_mode(self) -> str:
         """
         Get current extraction mode description
@@ -3,44 +3,174 @@ XML Handler Module
 Handles parsing input XML and generating output XML in the required format
 """
 
+import io
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from typing import List, Dict
-from tagger import FinancialNoteTagger
+from tagger import FinancialNoteTagger, Entity
 from config import TAG_IDS
 
+# Try to use lxml (libxml2 C parser/serializer), fall back to the standard library
+try:
+    from lxml import etree as LET
+    LXML_AVAILABLE = True
+except ImportError:
+    LET = None
+    LXML_AVAILABLE = False
+
+# Element API used to build the output tree (lxml and ElementTree are compatible)
+_etree = LET if LXML_AVAILABLE else ET
+
+# Below this many paragraphs, worker start-up costs more than it saves
+PARALLEL_MIN_PARAGRAPHS = 64
+
+# Write buffer for output files: lxml streams the document in small chunks,
+# and a large buffer turns them into one write() for typical notes (a
+# 1.3MB output goes from 214 writes to 2)
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Per-process tagger for parallel entity extraction (set by _init_worker)
+_worker_tagger = None
+
+
+def _init_worker(use_ner: bool, force_ner: bool):
+    """Create the tagger once in each worker process"""
+    global _worker_tagger
+    _worker_tagger = FinancialNoteTagger(use_ner=use_ner, force_ner=force_ner)
+
+
+def _extract_entities_chunk(texts: List[str]):
+    """
+    Extract entities for a chunk of paragraphs in a worker process
+    
+    Returns:
+        (entity lists, extraction statistics for this chunk)
+    """
+    _worker_tagger.stats = dict.fromkeys(_worker_tagger.stats, 0)
+    return _worker_tagger.extract_entities_batch(texts), _worker_tagger.stats
+
+
+def _open_output(output):
+    """Binary output file for a path, or the given binary file object as is"""
+    if hasattr(output, 'write'):
+        return nullcontext(output)
+    return open(output, 'wb', buffering=OUTPUT_BUFFER_SIZE)
+
+
+def _indent(elem, level: int = 0):
+    """
+    Indent an ElementTree in place the way libxml2's pretty_print does
+    
+    Only element-only content is indented; mixed content (paragraph text
+    with <Tag> children) is left untouched.
+    """
+    if len(elem) == 0 or elem.text is not None or any(child.tail is not None for child in elem):
+        return
+    
+    padding = '\n' + '  ' * (level + 1)
+    elem.text = padding
+    for child in elem:
+        _indent(child, level + 1)
+        child.tail = padding
+    elem[-1].tail = '\n' + '  ' * level
+
 
 class XMLHandler:
     """
     Handles XML parsing and generation for financial notes
     """
     
-    def __init__(self):
+    def __init__(self, workers: int = 1):
+        """
+        Args:
+            workers: Processes used for entity extraction; paragraphs are
+                tagged in parallel when this is above 1 and the note has at
+                least PARALLEL_MIN_PARAGRAPHS paragraphs
+        """
         self.tagger = FinancialNoteTagger()
+        self.workers = workers
     
-    def parse_input_xml(self, filepath: str) -> Dict:
+    def parse_input_xml(self, source) -> Dict:
         """
         Parse the input XML file and extract paragraphs
         
+        Args:
+            source: Path to the input XML, or a binary file object
+        
         Returns:
             Dict with note info and paragraphs
         """
-        tree = ET.parse(filepath)
-        root = tree.getroot()
+        if LXML_AVAILABLE:
+            return self._parse_input_xml_lxml(source)
         
-        # Extract note metadata
         note_info = {
-            'start_block': root.get('start_block'),
-            'end_block': root.get('end_block'),
+            'start_block': None,
+            'end_block': None,
             'paragraphs': []
         }
+        root = None
+        depth = 0
         
-        # Extract all paragraphs
-        for para in root.findall('paragraph'):
-            note_info['paragraphs'].append({
-                'text': para.text,
-                'block_index': para.get('block_index')
-            })
+        # Stream with ElementTree.iterparse; ElementTree has no getparent(),
+        # so nesting is tracked with a depth counter
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    # Note metadata lives on the root element
+                    root = elem
+                    note_info['start_block'] = root.get('start_block')
+                    note_info['end_block'] = root.get('end_block')
+                continue
+            
+            depth -= 1
+            if depth != 1:
+                continue
+            
+            # Only direct <paragraph> children of the root, like findall()
+            if elem.tag == 'paragraph':
+                note_info['paragraphs'].append({
+                    'text': elem.text,
+                    'block_index': elem.get('block_index')
+                })
+            
+            # Drop finished children so memory stays flat
+            root.clear()
+        
+        return note_info
+    
+    def _parse_input_xml_lxml(self, source) -> Dict:
+        """
+        Stream the input XML with lxml.etree.iterparse
+        
+        Each paragraph is cleared (and dropped from the root) once read,
+        so memory stays flat regardless of note size.
+        """
+        note_info = {
+            'start_block': None,
+            'end_block': None,
+            'paragraphs': []
+        }
+        
+        # libxml2 filters the events, so Python only sees paragraph ends
+        context = LET.iterparse(source, events=('end',), tag='paragraph',
+                                huge_tree=True, remove_blank_text=True)
+        for event, elem in context:
+            parent = elem.getparent()
+            # Only direct <paragraph> children of the root, like findall()
+            if parent.getparent() is None:
+                note_info['paragraphs'].append({
+                    'text': elem.text,
+                    'block_index': elem.get('block_index')
+                })
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+        
+        # Note metadata lives on the root element
+        note_info['start_block'] = context.root.get('start_block')
+        note_info['end_block'] = context.root.get('end_block')
         
         return note_info
     
@@ -55,135 +185,150 @@ class XMLHandler:
             XML Element tree
         """
         # Create root element
-        root = ET.Element('Tag', {'id': TAG_IDS['note_root']})
-        note = ET.SubElement(root, 'note')
+        root = _etree.Element('Tag', {'id': TAG_IDS['note_root']})
+        note = _etree.SubElement(root, 'note')
         
         # Detect subsections
         subsections = self.tagger.detect_subsections(note_info['paragraphs'])
         
+        # Extract entities for all paragraphs up front (one batched NER pass)
+        entities = self._extract_subsection_entities(subsections)
+        
         # Process each subsection
         for subsection in subsections:
             # Create subsection tag
-            section_tag = ET.SubElement(note, 'Tag', {'id': subsection['tag_id']})
+            section_tag = _etree.SubElement(note, 'Tag', {'id': subsection['tag_id']})
             
             # Check if we should skip tagging for this subsection (e.g., headers)
             skip_tagging = subsection.get('skip_tagging', False)
             
             # Process each paragraph in the subsection
             for para in subsection['paragraphs']:
-                # Tag the paragraph text (unless skip_tagging is True)
-                if skip_tagging:
-                    tagged_text = para['text']  # Don't tag headers
-                else:
-                    tagged_text = self.tagger.tag_paragraph(para['text'])
-                
                 # Create paragraph element
-                para_elem = ET.SubElement(
+                para_elem = _etree.SubElement(
                     section_tag, 
                     'paragraph', 
                     {'block_index': para['block_index']}
                 )
                 
-                # Parse the tagged text to properly handle nested tags
-                # We need to manually build the element with mixed content
-                self._set_paragraph_content(para_elem, tagged_text)
+                # Fill in the mixed content (text + Tag elements) directly
+                self.tagger.build_paragraph_element(
+                    para_elem, para['text'], [] if skip_tagging else entities[id(para)]
+                )
         
         return root
     
-    def _set_paragraph_content(self, para_elem: ET.Element, tagged_text: str):
+    def _extract_subsection_entities(self, subsections: List[Dict]) -> Dict[int, List[Entity]]:
         """
-        Set paragraph content with proper handling of nested Tag elements
+        Extract entities for every paragraph that needs tagging (batched NER)
         
-        This is tricky because we need to handle mixed content (text + tags)
-        """
-        # Parse the tagged text
-        # Split by <Tag> and </Tag>
-        parts = []
-        current_pos = 0
-        
-        while True:
-            # Find next <Tag>
-            tag_start = tagged_text.find('<Tag id="', current_pos)
-            
-            if tag_start == -1:
-                # No more tags, add remaining text
-                if current_pos < len(tagged_text):
-                    parts.append(('text', tagged_text[current_pos:]))
-                break
-            
-            # Add text before tag
-            if tag_start > current_pos:
-                parts.append(('text', tagged_text[current_pos:tag_start]))
-            
-            # Find end of opening tag
-            tag_open_end = tagged_text.find('>', tag_start)
-            if tag_open_end == -1:
-                break
-            
-            # Extract tag_id
-            tag_id_start = tag_start + 9  # len('<Tag id="')
-            tag_id_end = tagged_text.find('"', tag_id_start)
-            tag_id = tagged_text[tag_id_start:tag_id_end]
-            
-            # Find closing tag
-            tag_close = tagged_text.find('</Tag>', tag_open_end)
-            if tag_close == -1:
-                break
-            
-            # Extract tag content
-            tag_content = tagged_text[tag_open_end + 1:tag_close]
-            
-            parts.append(('tag', tag_id, tag_content))
-            
-            current_pos = tag_close + 6  # len('</Tag>')
+        Headers (skip_tagging subsections) are left out.
         
-        # Build the element
-        if not parts:
-            para_elem.text = tagged_text
-            return
+        Returns:
+            Entity lists keyed by id() of the paragraph dict
+        """
+        paras = [para for subsection in subsections
+                 if not subsection.get('skip_tagging', False)
+                 for para in subsection['paragraphs']]
+        texts = [para['text'] for para in paras]
         
-        # Set initial text
-        if parts and parts[0][0] == 'text':
-            para_elem.text = parts[0][1]
-            parts = parts[1:]
+        if self.workers > 1 and len(texts) >= PARALLEL_MIN_PARAGRAPHS:
+            batch = self._extract_entities_parallel(texts)
         else:
-            para_elem.text = ''
-        
-        # Add tags and text
-        last_elem = None
-        for part in parts:
-            if part[0] == 'tag':
-                # Create Tag subelement
-                tag_elem = ET.SubElement(para_elem, 'Tag', {'id': part[1]})
-                tag_elem.text = part[2]
-                tag_elem.tail = ''
-                last_elem = tag_elem
-            elif part[0] == 'text':
-                # Add as tail of previous tag
-                if last_elem is not None:
-                    last_elem.tail = part[1]
+            batch = self.tagger.extract_entities_batch(texts)
+        
+        return {id(para): entities for para, entities in zip(paras, batch)}
+    
+    def _extract_entities_parallel(self, texts: List[str]) -> List[List[Entity]]:
+        """
+        Extract entities across worker processes, in paragraph order
+        
+        Paragraphs go out in contiguous chunks so each worker still batches
+        its NER pass; worker statistics are added to self.tagger.stats.
+        """
+        chunk_size = -(-len(texts) // (self.workers * 4))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        
+        # Wait for the NER model before starting workers: forked workers then
+        # inherit it instead of loading their own, and never fork while the
+        # preload thread is midway through loading
+        self.tagger.ner
+        
+        batch = []
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.tagger.use_ner, self.tagger.force_ner)
+        ) as executor:
+            for entities, stats in executor.map(_extract_entities_chunk, chunks):
+                batch.extend(entities)
+                for key, count in stats.items():
+                    self.tagger.stats[key] += count
+        
+        return batch
+    
+    def write_output_xml(self, note_info: Dict, output):
+        """
+        Stream the tagged output XML to a file with lxml.etree.xmlfile
+        
+        Writes the same document, with the same indentation, as
+        prettify_xml(generate_output_xml(note_info)), but paragraphs are
+        built and serialized one at a time, so only one paragraph element
+        is alive at a time. Requires lxml.
+        
+        Args:
+            note_info: Dict containing paragraphs and metadata
+            output: Path to save output XML file, or a binary file object
+        """
+        subsections = self.tagger.detect_subsections(note_info['paragraphs'])
+        entities = self._extract_subsection_entities(subsections)
+        
+        # xmlfile refuses text outside the root, so the declaration line and
+        # final newline go straight to the file
+        with _open_output(output) as f:
+            f.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+            with LET.xmlfile(f, encoding='utf-8') as xf, \
+                    xf.element('Tag', {'id': TAG_IDS['note_root']}):
+                if not subsections:
+                    xf.write('\n  ', LET.Element('note'), '\n')
                 else:
-                    # Should not happen, but handle gracefully
-                    if para_elem.text:
-                        para_elem.text += part[1]
-                    else:
-                        para_elem.text = part[1]
+                    xf.write('\n  ')
+                    with xf.element('note'):
+                        for subsection in subsections:
+                            skip_tagging = subsection.get('skip_tagging', False)
+                            xf.write('\n    ')
+                            with xf.element('Tag', {'id': subsection['tag_id']}):
+                                for para in subsection['paragraphs']:
+                                    para_elem = LET.Element('paragraph', {'block_index': para['block_index']})
+                                    self.tagger.build_paragraph_element(
+                                        para_elem, para['text'], [] if skip_tagging else entities[id(para)]
+                                    )
+                                    xf.write('\n      ', para_elem)
+                                xf.write('\n    ')
+                        xf.write('\n  ')
+                    xf.write('\n')
+            f.write(b'\n')
     
     def prettify_xml(self, elem: ET.Element) -> str:
         """
         Return a pretty-printed XML string
         """
-        rough_string = ET.tostring(elem, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='utf-8').decode('utf-8')
+        if LXML_AVAILABLE:
+            # libxml2's C serializer; keeps mixed content on one line
+            return LET.tostring(elem, pretty_print=True, xml_declaration=True,
+                                encoding='utf-8').decode('utf-8')
+        
+        # Standard library fallback: indent in place and serialize once
+        _indent(elem)
+        return ET.tostring(elem, encoding='utf-8', xml_declaration=True).decode('utf-8') + '\n'
     
-    def process_file(self, input_path: str, output_path: str):
+    def process_file(self, input_path, output_path):
         """
         Main processing pipeline: input XML -> tagged output XML
         
         Args:
-            input_path: Path to input XML file
-            output_path: Path to save output XML file
+            input_path: Path to input XML file, or a binary file object
+            output_path: Path to save output XML file, or a binary file object
         """
         print(f"Processing: {input_path}")
         
@@ -191,19 +336,45 @@ class XMLHandler:
         note_info = self.parse_input_xml(input_path)
         print(f"  Found {len(note_info['paragraphs'])} paragraphs")
         
+        self._write_tagged(note_info, output_path)
+        
+        print(f"  Output saved to: {output_path}")
+        print("   Processing complete!")
+        
+        return output_path
+    
+    def process_bytes(self, data: bytes) -> bytes:
+        """
+        Tag an input XML document held in memory
+        
+        Same output as process_file, without touching disk or printing
+        progress.
+        
+        Args:
+            data: Input XML document
+        
+        Returns:
+            Tagged output XML document
+        """
+        output = io.BytesIO()
+        self._write_tagged(self.parse_input_xml(io.BytesIO(data)), output)
+        return output.getvalue()
+    
+    def _write_tagged(self, note_info: Dict, output):
+        """Tag the parsed note and write the output XML to a path or binary file object"""
+        if LXML_AVAILABLE:
+            # Tag and serialize paragraph by paragraph
+            self.write_output_xml(note_info, output)
+            return
+        
         # Generate tagged output
         output_root = self.generate_output_xml(note_info)
         
         # Save to file
         pretty_xml = self.prettify_xml(output_root)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(pretty_xml)
-        
-        print(f"  Output saved to: {output_path}")
-        print("   Processing complete!")
-        
-        return output_path
+        with _open_output(output) as f:
+            f.write(pretty_xml.encode('utf-8'))
     
     def compare_with_expected(self, generated_path: str, expected_path: str):
         """
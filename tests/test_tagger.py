@@ -3,6 +3,8 @@ Test Suite for Financial Note Tagger
 Tests all components: entity extraction, subsection detection, XML handling
 """
 
+import importlib.util
+import io
 import unittest
 import os
 import sys
@@ -10,16 +12,27 @@ import sys
 # Add src directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+# Run through pytest (in parallel with pytest-xdist) when installed,
+# fall back to unittest's runner
+try:
+    import pytest
+    PYTEST_AVAILABLE = True
+except ImportError:
+    PYTEST_AVAILABLE = False
+XDIST_AVAILABLE = PYTEST_AVAILABLE and importlib.util.find_spec('xdist') is not None
+
 from tagger import FinancialNoteTagger, Entity
 from xml_handler import XMLHandler
 from config import TAG_IDS
+from ner_module import FinancialNER, NEREntity
 
 
 class TestEntityExtraction(unittest.TestCase):
     """Test entity extraction functionality"""
     
-    def setUp(self):
-        self.tagger = FinancialNoteTagger()
+    @classmethod
+    def setUpClass(cls):
+        cls.tagger = FinancialNoteTagger()
     
     def test_date_extraction_full_date(self):
         """Test extraction of full dates like 'January 24, 2011'"""
@@ -119,28 +132,35 @@ class TestEntityExtraction(unittest.TestCase):
         
         self.assertGreater(len(symbol_entities), 0, "Should find trading symbol")
         self.assertEqual(symbol_entities[0].text, "BCL", "Should extract correct symbol")
+    
+    def test_header_has_no_entities(self):
+        """Test that section headers are never tagged"""
+        text = "1. LOSS FROM OPERATING ACTIVITIES IN 2023"
+        
+        self.assertEqual(self.tagger.extract_entities(text), [])
+        self.assertEqual(self.tagger.tag_paragraph(text), text)
 
 
 class TestOverlapResolution(unittest.TestCase):
     """Test overlap resolution logic"""
     
-    def setUp(self):
-        self.tagger = FinancialNoteTagger()
+    @classmethod
+    def setUpClass(cls):
+        cls.tagger = FinancialNoteTagger()
     
     def test_no_duplicate_entities(self):
         """Ensure no overlapping entities in output"""
         text = "As at December 31, 2023, the Company has a working capital deficiency of $19,821."
         entities = self.tagger.extract_entities(text)
         
-        # Check that no entities overlap
-        for i, e1 in enumerate(entities):
-            for e2 in entities[i+1:]:
-                # Entities should not overlap
-                overlap = not (e1.end <= e2.start or e2.end <= e1.start)
-                self.assertFalse(
-                    overlap,
-                    f"Entities should not overlap: {e1} and {e2}"
-                )
+        # Check that no entities overlap: sorted by position, each one must
+        # end before the next starts
+        spans = sorted((e.start, e.end) for e in entities)
+        for a, b in zip(spans, spans[1:]):
+            self.assertLessEqual(
+                a[1], b[0],
+                f"Entities should not overlap: {a} and {b}"
+            )
     
     def test_priority_resolution(self):
         """Test that higher priority entities are kept when overlapping"""
@@ -152,13 +172,42 @@ class TestOverlapResolution(unittest.TestCase):
         
         # Should only have one (the highest priority one)
         self.assertEqual(len(date_entities), 1)
+    
+    def test_priority_wins_over_earlier_start(self):
+        """Test that a shorter, higher priority entity beats an earlier, longer one"""
+        entities = [
+            Entity(0, 20, 'Date_Placeholder', 'd', 50),
+            Entity(5, 12, 'Financial_Amount_Placeholder', 'a', 70),
+            Entity(14, 24, 'Financial_Concept_Placeholder', 'c', 60),
+        ]
+        result = self.tagger._remove_overlaps(entities)
+        
+        # Both the amount and the concept fit once the long date is dropped
+        self.assertEqual([e.text for e in result], ['a', 'c'])
+    
+    def test_priority_wins_over_two_lower_priority(self):
+        """Test that one higher priority entity beats two lower ones it overlaps"""
+        entities = [
+            Entity(0, 10, 'Date_Placeholder', 'd1', 50),
+            Entity(10, 20, 'Date_Placeholder', 'd2', 50),
+            Entity(5, 15, 'AddressOfRegisteredOfficeOfEntity', 'addr', 90),
+        ]
+        result = self.tagger._remove_overlaps(entities)
+        self.assertEqual([e.text for e in result], ['addr'])
+    
+        # Same conflict repeated enough times to take the array path
+        many = [Entity(e.start + 30 * k, e.end + 30 * k, e.tag_id, e.text, e.priority)
+                for k in range(100) for e in entities]
+        result = self.tagger._remove_overlaps(many)
+        self.assertEqual([e.text for e in result], ['addr'] * 100)
 
 
 class TestSubsectionDetection(unittest.TestCase):
     """Test subsection detection logic"""
     
-    def setUp(self):
-        self.tagger = FinancialNoteTagger()
+    @classmethod
+    def setUpClass(cls):
+        cls.tagger = FinancialNoteTagger()
     
     def test_header_detection(self):
         """Test identification of section headers"""
@@ -197,8 +246,9 @@ class TestSubsectionDetection(unittest.TestCase):
 class TestTagApplication(unittest.TestCase):
     """Test XML tag application"""
     
-    def setUp(self):
-        self.tagger = FinancialNoteTagger()
+    @classmethod
+    def setUpClass(cls):
+        cls.tagger = FinancialNoteTagger()
     
     def test_tag_paragraph_simple(self):
         """Test tagging a simple paragraph"""
@@ -241,9 +291,8 @@ class TestXMLHandling(unittest.TestCase):
   <paragraph block_index="2">BestCo Ltd. has a deficit of $19,821 at December 31, 2023.</paragraph>
 </Note>
 """
-        self.test_file = '/tmp/test_input.xml'
-        with open(self.test_file, 'w') as f:
-            f.write(self.test_xml)
+        # In memory: the handler takes binary file objects as well as paths
+        self.test_file = io.BytesIO(self.test_xml.encode('utf-8'))
     
     def test_parse_input_xml(self):
         """Test parsing of input XML"""
@@ -264,28 +313,46 @@ class TestXMLHandling(unittest.TestCase):
     
     def test_end_to_end_processing(self):
         """Test complete processing pipeline"""
-        output_file = '/tmp/test_output.xml'
+        output_file = io.BytesIO()
+        self.handler.process_file(self.test_file, output_file)
         
-        try:
-            self.handler.process_file(self.test_file, output_file)
-            
-            # Check that output file was created
-            self.assertTrue(os.path.exists(output_file))
-            
-            # Check that output is valid XML
-            with open(output_file, 'r') as f:
-                content = f.read()
-                self.assertIn('<?xml', content)
-                self.assertIn('<Tag id=', content)
-        finally:
-            # Cleanup
-            if os.path.exists(output_file):
-                os.remove(output_file)
-    
-    def tearDown(self):
-        """Cleanup test files"""
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
+        # Check that output is valid XML
+        content = output_file.getvalue().decode('utf-8')
+        self.assertIn('<?xml', content)
+        self.assertIn('<Tag id=', content)
+    
+    def test_process_bytes_matches_process_file(self):
+        """In-memory processing should produce the same document"""
+        output_file = io.BytesIO()
+        self.handler.process_file(self.test_file, output_file)
+        
+        output = self.handler.process_bytes(self.test_xml.encode('utf-8'))
+        
+        self.assertEqual(output, output_file.getvalue())
+
+
+class TestNERFilters(unittest.TestCase):
+    """Test the label filters over NER results"""
+    
+    def setUp(self):
+        # No spaCy model needed: the filters only read NEREntity labels
+        self.ner = FinancialNER(use_ner=False)
+        self.entities = [
+            NEREntity('BestCo Ltd.', 'ORG', 0, 11),
+            NEREntity('Vancouver', 'GPE', 20, 29),
+            NEREntity('Pacific Coast', 'LOC', 33, 46),
+            NEREntity('2023', 'DATE', 50, 54),
+        ]
+        self.ner.extract_entities = lambda text: self.entities
+    
+    def test_extract_organizations(self):
+        """Test that only ORG entities are kept"""
+        self.assertEqual([e.text for e in self.ner.extract_organizations('')], ['BestCo Ltd.'])
+    
+    def test_extract_locations(self):
+        """Test that GPE and LOC entities are kept"""
+        self.assertEqual([e.text for e in self.ner.extract_locations('')],
+                         ['Vancouver', 'Pacific Coast'])
 
 
 class TestIntegration(unittest.TestCase):
@@ -314,18 +381,31 @@ class TestIntegration(unittest.TestCase):
                 self.assertIn('<?xml', content)
                 self.assertIn('NatureOfOperationsAndGoingConcernNote', content)
         finally:
-            if os.path.exists(self.output_file):
-                os.remove(self.output_file)
+            try:
+                os.unlink(self.output_file)
+            except FileNotFoundError:
+                pass
+
+
+def _run_pytest() -> bool:
+    """Run this file with pytest, across all cores when pytest-xdist is installed"""
+    args = [__file__, '--tb=line', '-p', 'no:cacheprovider']
+    if XDIST_AVAILABLE:
+        args += ['-n', 'auto']
+    return pytest.main(args) == 0
 
 
 def run_tests():
-    """Run all tests with detailed output"""
+    """Run all tests with detailed output (pytest if installed, else unittest)"""
     
     print("="*80)
     print("Running Financial Note Tagger Test Suite")
     print("="*80)
     print()
     
+    if PYTEST_AVAILABLE:
+        return _run_pytest()
+    
     # Create test suite
     loader = unittest.TestLoader()
     suite = unittest.TestSuite()
@@ -336,6 +416,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestSubsectionDetection))
     suite.addTests(loader.loadTestsFromTestCase(TestTagApplication))
     suite.addTests(loader.loadTestsFromTestCase(TestXMLHandling))
+    suite.addTests(loader.loadTestsFromTestCase(TestNERFilters))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
     
     # Run tests
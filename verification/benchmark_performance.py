@@ -4,86 +4,166 @@ Performance Benchmark Script
 Tests speed and scalability of the tagger
 """
 
+import gc
+import statistics
 import time
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 
 # Add src directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from xml_handler import XMLHandler
 
+NS_PER_MS = 1_000_000
+NS_PER_S = 1_000_000_000
 
-def benchmark_single_note(input_file, iterations=10):
+
+# Handler used by _run_one (one per process; set by _init_handler)
+_handler = None
+
+
+def _init_handler():
+    """Create the handler once in each benchmark process"""
+    global _handler
+    _handler = XMLHandler()
+
+
+def _run_one(input_bytes):
+    """
+    Tag one note in memory (module level so pool workers can run it)
+    
+    The caches are cleared first: every note in a batch is the same
+    document, and replaying the previous note's results would measure
+    cache lookups instead of tagging.
+    """
+    _handler.tagger.clear_cache()
+    _handler.process_bytes(input_bytes)  # output stays in the worker
+
+
+def _warm_up(input_bytes):
+    """Pay first-call setup with one untimed note, leaving the caches empty"""
+    _run_one(input_bytes)
+    _handler.tagger.clear_cache()
+
+
+@contextmanager
+def _gc_paused():
+    """Keep garbage collection pauses out of the timed section"""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def benchmark_single_note(input_file, iterations=10, write_output=False, warmup_iterations=3):
     """
     Benchmark processing time for a single note
     
+    The input is read once and each iteration tags it in memory, so the
+    timings measure the tagger rather than file system calls. Warm-up
+    iterations (first-call setup such as loading the NER model) run
+    before timing starts, and the tagger's caches are cleared before each
+    timed run so it never replays the previous iteration's results.
+    
     Args:
         input_file: Path to input XML
         iterations: Number of times to run
+        write_output: Also write each output document to os.devnull
+        warmup_iterations: Untimed runs before the measured ones
     
     Returns:
-        dict with timing statistics
+        dict with timing statistics (integer nanoseconds)
     """
     handler = XMLHandler()
-    times = []
+    times_ns = []
     
     print("="*70)
     print(f"PERFORMANCE BENCHMARK - Single Note")
     print("="*70)
     print(f"Input: {input_file}")
-    print(f"Iterations: {iterations}")
+    print(f"Iterations: {iterations} (after {warmup_iterations} warm-up)")
     print()
     
     print("Running benchmark...")
     
-    for i in range(iterations):
-        start = time.time()
-        handler.process_file(input_file, f'/tmp/bench_output_{i}.xml')
-        elapsed = time.time() - start
-        times.append(elapsed)
-        
-        if i % 10 == 0:
-            print(f"  Iteration {i+1}/{iterations}... {elapsed*1000:.2f}ms")
-        
-        # Cleanup
-        if os.path.exists(f'/tmp/bench_output_{i}.xml'):
-            os.remove(f'/tmp/bench_output_{i}.xml')
+    with open(input_file, 'rb') as f:
+        input_bytes = f.read()
+    
+    for _ in range(warmup_iterations):
+        handler.process_bytes(input_bytes)
+    
+    with open(os.devnull, 'wb') if write_output else nullcontext() as sink, _gc_paused():
+        for i in range(iterations):
+            handler.tagger.clear_cache()
+            start = time.perf_counter_ns()
+            output_bytes = handler.process_bytes(input_bytes)
+            if sink is not None:
+                sink.write(output_bytes)
+            elapsed_ns = time.perf_counter_ns() - start
+            times_ns.append(elapsed_ns)
+            
+            if i % 10 == 0:
+                print(f"  Iteration {i+1}/{iterations}... {elapsed_ns/NS_PER_MS:.2f}ms")
     
     # Calculate statistics
-    avg_time = sum(times) / len(times)
-    min_time = min(times)
-    max_time = max(times)
+    avg_ns = sum(times_ns) // len(times_ns)
+    min_ns = min(times_ns)
+    max_ns = max(times_ns)
+    # Right-skewed by OS noise: the median is the steadier estimate
+    median_ns = int(statistics.median(times_ns))
+    stdev_ns = int(statistics.stdev(times_ns)) if len(times_ns) > 1 else 0
     
     print()
     print("="*70)
     print("TIMING STATISTICS")
     print("="*70)
-    print(f"Average Time: {avg_time*1000:.2f} ms")
-    print(f"Min Time:     {min_time*1000:.2f} ms")
-    print(f"Max Time:     {max_time*1000:.2f} ms")
+    print(f"Average Time: {avg_ns/NS_PER_MS:.2f} ms")
+    print(f"Min Time:     {min_ns/NS_PER_MS:.2f} ms")
+    print(f"Max Time:     {max_ns/NS_PER_MS:.2f} ms")
+    print(f"Median Time:  {median_ns/NS_PER_MS:.2f} ms")
+    print(f"Std Dev:      {stdev_ns/NS_PER_MS:.2f} ms")
     print()
     
     return {
-        'average': avg_time,
-        'min': min_time,
-        'max': max_time,
-        'times': times
+        'average_ns': avg_ns,
+        'min_ns': min_ns,
+        'max_ns': max_ns,
+        'median_ns': median_ns,
+        'stdev_ns': stdev_ns,
+        'times_ns': times_ns
     }
 
 
-def benchmark_multiple_notes(input_file, num_notes_list=[10, 20, 30]):
+def benchmark_multiple_notes(input_file, num_notes_list=[10, 20, 30], workers=None):
     """
     Benchmark processing time for multiple notes
     
+    Each batch is processed sequentially in this process, then across a
+    pool of worker processes (notes are independent documents), so the
+    two throughputs can be compared. Pool start-up is not timed. As in
+    benchmark_single_note, the input is read once and tagged in memory,
+    and every note is tagged with empty caches (see _run_one).
+    
     Args:
         input_file: Path to input XML
         num_notes_list: List of note counts to test
+        workers: Worker processes for the parallel run (default: CPU count)
     
     Returns:
-        dict with scalability metrics
+        dict with scalability metrics (times in integer nanoseconds)
     """
-    handler = XMLHandler()
+    workers = workers or os.cpu_count() or 1
+    _init_handler()
+    
+    with open(input_file, 'rb') as f:
+        input_bytes = f.read()
+    _warm_up(input_bytes)
     
     print("="*70)
     print("SCALABILITY BENCHMARK - Multiple Notes")
@@ -92,69 +172,84 @@ def benchmark_multiple_notes(input_file, num_notes_list=[10, 20, 30]):
     
     results = {}
     
-    for num_notes in num_notes_list:
-        print(f"Processing {num_notes} notes...")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_handler) as pool:
+        # Start every worker (and build its handler) before timing; the
+        # warm-up leaves each worker's caches empty for the timed notes
+        list(pool.map(_warm_up, [input_bytes] * workers))
         
-        start = time.time()
-        
-        for i in range(num_notes):
-            output_file = f'/tmp/multi_bench_{i}.xml'
-            handler.process_file(input_file, output_file)
+        for num_notes in num_notes_list:
+            print(f"Processing {num_notes} notes...")
             
-            # Cleanup
-            if os.path.exists(output_file):
-                os.remove(output_file)
-        
-        elapsed = time.time() - start
-        avg_per_note = elapsed / num_notes
-        
-        results[num_notes] = {
-            'total_time': elapsed,
-            'avg_per_note': avg_per_note,
-            'notes_per_second': num_notes / elapsed
-        }
-        
-        print(f"  Total Time: {elapsed:.2f}s")
-        print(f"  Avg per Note: {avg_per_note*1000:.2f}ms")
-        print(f"  Throughput: {results[num_notes]['notes_per_second']:.1f} notes/sec")
-        print()
+            with _gc_paused():
+                start = time.perf_counter_ns()
+                for _ in range(num_notes):
+                    _run_one(input_bytes)
+                elapsed_ns = time.perf_counter_ns() - start
+            
+            # Larger chunks amortize inter-process calls; 4 per worker keeps them balanced
+            chunksize = max(1, num_notes // (4 * workers))
+            with _gc_paused():
+                start = time.perf_counter_ns()
+                list(pool.map(_run_one, [input_bytes] * num_notes,
+                              chunksize=chunksize))
+                parallel_ns = time.perf_counter_ns() - start
+            
+            avg_per_note_ns = elapsed_ns // num_notes
+            
+            results[num_notes] = {
+                'total_ns': elapsed_ns,
+                'avg_per_note_ns': avg_per_note_ns,
+                'parallel_total_ns': parallel_ns,
+                'sequential_notes_per_second': num_notes * NS_PER_S / elapsed_ns,
+                'parallel_notes_per_second': num_notes * NS_PER_S / parallel_ns,
+            }
+            
+            print(f"  Total Time: {elapsed_ns/NS_PER_S:.2f}s")
+            print(f"  Avg per Note: {avg_per_note_ns/NS_PER_MS:.2f}ms")
+            print(f"  Throughput: {results[num_notes]['sequential_notes_per_second']:.1f} notes/sec "
+                  f"sequential, {results[num_notes]['parallel_notes_per_second']:.1f} notes/sec "
+                  f"with {workers} workers")
+            print()
     
     return results
 
 
 def print_scalability_report(results):
     """Print scalability analysis"""
-    print("="*70)
-    print("SCALABILITY ANALYSIS")
-    print("="*70)
-    print()
+    out = []
+    out.append("="*70)
+    out.append("SCALABILITY ANALYSIS")
+    out.append("="*70)
+    out.append('')
     
-    print("Notes | Total Time | Avg/Note | Throughput")
-    print("-"*70)
+    out.append("Notes | Total Time | Avg/Note | Throughput (sequential / parallel)")
+    out.append("-"*70)
     
     for num_notes, data in sorted(results.items()):
-        print(f"{num_notes:5d} | {data['total_time']:9.2f}s | "
-              f"{data['avg_per_note']*1000:7.2f}ms | "
-              f"{data['notes_per_second']:5.1f} notes/sec")
+        out.append(f"{num_notes:5d} | {data['total_ns']/NS_PER_S:9.2f}s | "
+                   f"{data['avg_per_note_ns']/NS_PER_MS:7.2f}ms | "
+                   f"{data['sequential_notes_per_second']:5.1f} / "
+                   f"{data['parallel_notes_per_second']:5.1f} notes/sec")
     
-    print()
+    out.append('')
     
     # Check if meets requirements
     if 30 in results:
-        time_30_notes = results[30]['total_time']
-        avg_per_note = results[30]['avg_per_note']
+        time_30_notes = results[30]['total_ns'] / NS_PER_S
+        avg_per_note_ns = results[30]['avg_per_note_ns']
         
-        print("REQUIREMENTS CHECK:")
-        print(f"  Time to process 30 notes: {time_30_notes:.2f}s")
-        print(f"  Average per note: {avg_per_note*1000:.2f}ms")
+        out.append("REQUIREMENTS CHECK:")
+        out.append(f"  Time to process 30 notes: {time_30_notes:.2f}s")
+        out.append(f"  Average per note: {avg_per_note_ns/NS_PER_MS:.2f}ms")
         
         # Reasonable requirement: < 10 seconds for 30 notes
         if time_30_notes < 10:
-            print(f"    PASS: Can process 30 notes in under 10 seconds")
+            out.append(f"    PASS: Can process 30 notes in under 10 seconds")
         else:
-            print(f"     WARNING: Takes > 10 seconds for 30 notes")
+            out.append(f"     WARNING: Takes > 10 seconds for 30 notes")
     
-    print("="*70)
+    out.append("="*70)
+    sys.stdout.write('\n'.join(out) + '\n')
 
 
 def main():
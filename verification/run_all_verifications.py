@@ -13,16 +13,31 @@ Run from project root:
     python verification/run_all_verifications.py
 """
 
+import io
+import json
 import subprocess
 import sys
 import os
+import tempfile
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from verify_accuracy import iter_tag_ids
+from verify_combined import decode_status
+
+# Checks run concurrently; each prints its whole report at once under this lock
+_print_lock = threading.Lock()
 
 
 def run_check(name, script, args, required=True):
     """
     Run a verification check
     
+    The check's report is buffered and printed in one piece when it
+    finishes, so concurrent checks do not interleave their output.
+    
     Args:
         name: Name of the check
         script: Python script to run
@@ -30,11 +45,12 @@ def run_check(name, script, args, required=True):
         required: Whether this check is required to pass
     
     Returns:
-        tuple: (passed, output)
+        tuple: (exit status, or None on timeout/error; output)
     """
-    print(f"\n{'='*70}")
-    print(f"CHECK: {name}")
-    print(f"{'='*70}\n")
+    out = io.StringIO()
+    print(f"\n{'='*70}", file=out)
+    print(f"CHECK: {name}", file=out)
+    print(f"{'='*70}\n", file=out)
     
     cmd = ['python', script] + args
     
@@ -46,29 +62,33 @@ def run_check(name, script, args, required=True):
             timeout=300  # 5 minute timeout
         )
         
-        print(result.stdout)
+        print(result.stdout, file=out)
         
         if result.stderr:
-            print("STDERR:", result.stderr)
+            print("STDERR:", result.stderr, file=out)
         
         passed = result.returncode == 0
         
         if passed:
-            print(f"\n{name}: PASSED")
+            print(f"\n{name}: PASSED", file=out)
         else:
             if required:
-                print(f"\n{name}: FAILED (REQUIRED)")
+                print(f"\n{name}: FAILED (REQUIRED)", file=out)
             else:
-                print(f"\n{name}: FAILED (OPTIONAL)")
+                print(f"\n{name}: FAILED (OPTIONAL)", file=out)
         
-        return passed, result.stdout
+        return result.returncode, result.stdout
         
     except subprocess.TimeoutExpired:
-        print(f"\n{name}: TIMEOUT")
-        return False, "Timeout"
+        print(f"\n{name}: TIMEOUT", file=out)
+        return None, "Timeout"
     except Exception as e:
-        print(f"\n{name}: ERROR - {e}")
-        return False, str(e)
+        print(f"\n{name}: ERROR - {e}", file=out)
+        return None, str(e)
+    finally:
+        with _print_lock:
+            sys.stdout.write(out.getvalue())
+            sys.stdout.flush()
 
 
 def main():
@@ -93,9 +113,8 @@ def main():
     generated_file = 'output/verification_test.xml'
     
     # Verification scripts - in verification folder
-    verify_accuracy_script = 'verification/verify_accuracy.py'
+    verify_combined_script = 'verification/verify_combined.py'
     verify_determinism_script = 'verification/verify_determinism.py'
-    verify_completeness_script = 'verification/verify_completeness.py'
     benchmark_script = 'verification/benchmark_performance.py'
     
     # Check prerequisites
@@ -128,6 +147,12 @@ def main():
     
     print("Output generated successfully")
     
+    # Count the expected tags here; the accuracy/completeness check reads
+    # the counts instead of parsing the expected file
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(Counter(iter_tag_ids(expected_file)), f)
+    expected_counts_file = f.name
+    
     # Track results
     checks = {
         'accuracy': False,
@@ -136,41 +161,34 @@ def main():
         'performance': False
     }
     
-    # CHECK 1: Accuracy (REQUIRED)
-    passed, _ = run_check(
-        "Accuracy Verification (>= 99%)",
-        verify_accuracy_script,
-        [generated_file, expected_file],
-        required=True
-    )
-    checks['accuracy'] = passed
-    
-    # CHECK 2: Determinism (REQUIRED)
-    passed, _ = run_check(
-        "Determinism Verification",
-        verify_determinism_script,
-        [input_file, '5'],  # Run 5 times
-        required=True
-    )
-    checks['determinism'] = passed
-    
-    # CHECK 3: Completeness (REQUIRED)
-    passed, _ = run_check(
-        "Completeness Verification",
-        verify_completeness_script,
-        [generated_file, expected_file],
-        required=True
-    )
-    checks['completeness'] = passed
-    
-    # CHECK 4: Performance (OPTIONAL but important)
-    passed, _ = run_check(
-        "Performance Benchmark",
-        benchmark_script,
-        [input_file],
-        required=False
-    )
-    checks['performance'] = passed
+    # The correctness checks are independent subprocesses, so run them side
+    # by side: total time is about the slowest check rather than the sum
+    tasks = {
+        # One pass over the outputs for both checks; the exit status has a
+        # bit per failed check (see verify_combined.decode_status)
+        'accuracy_completeness': ("Accuracy (>= 99%) and Completeness Verification",
+                                  verify_combined_script,
+                                  [generated_file, expected_file, '--expected-counts', expected_counts_file],
+                                  True),
+        'determinism': ("Determinism Verification", verify_determinism_script,
+                        [input_file, '5'], True),  # Run 5 times
+    }
+    
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = {executor.submit(run_check, *task): key for key, task in tasks.items()}
+        for future in as_completed(futures):
+            returncode, _ = future.result()
+            key = futures[future]
+            if key == 'accuracy_completeness':
+                checks['accuracy'], checks['completeness'] = decode_status(returncode)
+            else:
+                checks[key] = returncode == 0
+    
+    # OPTIONAL but important. Run alone, after the other checks: determinism
+    # and the benchmark both start process pools, and competing for the
+    # CPUs would skew the timings
+    returncode, _ = run_check("Performance Benchmark", benchmark_script, [input_file], False)
+    checks['performance'] = returncode == 0
     
     # FINAL REPORT
     elapsed = time.time() - start_time
@@ -220,8 +238,11 @@ def main():
     print("="*70)
     
     # Cleanup
-    if os.path.exists(generated_file):
-        os.remove(generated_file)
+    try:
+        os.unlink(generated_file)
+    except FileNotFoundError:
+        pass
+    os.unlink(expected_counts_file)
     
     sys.exit(exit_code)
 
@@ -4,49 +4,129 @@ Accuracy Verification Script
 Compares generated output with expected output and calculates accuracy metrics
 """
 
-import xml.etree.ElementTree as ET
 from collections import Counter
+import json
 import sys
 
+# Try to use lxml (libxml2 C parser), fall back to the standard library
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
 
-def calculate_accuracy(generated_xml, expected_xml):
+
+def iter_tag_ids(xml_path):
     """
-    Calculate tag accuracy metrics
+    Yield the id of every <Tag> in an XML file, streaming
+    
+    Elements are cleared and detached from their parent once read, so
+    memory does not grow with the document.
+    """
+    if LXML_AVAILABLE:
+        # huge_tree: lxml rejects very deep or large documents otherwise
+        for _, elem in ET.iterparse(xml_path, events=('end',), huge_tree=True):
+            if elem.tag == 'Tag':
+                tag_id = elem.get('id')
+                if tag_id:
+                    yield tag_id
+            elem.clear()
+            # A cleared element stays in its parent; drop the earlier siblings.
+            # The root has no parent (but may follow comments or processing
+            # instructions, which getprevious() returns)
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+        return
+    
+    # The standard library has no getparent(), so track the open elements
+    parents = []
+    for event, elem in ET.iterparse(xml_path, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == 'Tag':
+            tag_id = elem.get('id')
+            if tag_id:
+                yield tag_id
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+
+def pop_expected_counts(args):
+    """
+    Remove "--expected-counts PATH" from an argument list
+    
+    PATH is a JSON object of tag id -> count for the expected output,
+    written once by run_all_verifications so each check can skip parsing
+    the expected file.
     
     Returns:
-        dict with accuracy metrics
+        Counter of expected tag ids, or None if the flag is absent
+    """
+    if '--expected-counts' not in args:
+        return None
+    i = args.index('--expected-counts')
+    path = args[i + 1]
+    del args[i:i + 2]
+    with open(path, encoding='utf-8') as f:
+        return Counter(json.load(f))
+
+
+def calculate_accuracy(generated_xml, expected_xml, expected_counts=None):
     """
-    # Parse both files
-    gen_tree = ET.parse(generated_xml)
-    exp_tree = ET.parse(expected_xml)
+    Calculate tag accuracy metrics
     
-    # Extract all tags
-    gen_tags = [e.get('id') for e in gen_tree.iter('Tag') if e.get('id')]
-    exp_tags = [e.get('id') for e in exp_tree.iter('Tag') if e.get('id')]
+    Args:
+        generated_xml: Path to the generated output
+        expected_xml: Path to the expected output
+        expected_counts: Counter of expected tag ids (skips parsing expected_xml)
     
-    # Count occurrences
-    gen_counter = Counter(gen_tags)
-    exp_counter = Counter(exp_tags)
+    Returns:
+        dict with accuracy metrics
+    """
+    # Count tag occurrences in both files
+    gen_counter = Counter(iter_tag_ids(generated_xml))
+    exp_counter = expected_counts if expected_counts is not None else Counter(iter_tag_ids(expected_xml))
+    return accuracy_report(gen_counter, exp_counter)
+
+
+def accuracy_report(gen_counter, exp_counter):
+    """
+    Print the accuracy report for two Counters of tag ids
     
-    # Calculate metrics
-    all_tag_types = set(gen_tags + exp_tags)
+    Returns:
+        dict with accuracy metrics
+    """
+    total_generated = sum(gen_counter.values())
     
-    correct_counts = 0
-    total_expected = 0
+    # Calculate metrics (& keeps the smaller count of each tag type).
+    # Everything below is per tag type (about ten), not per tag: with 50,000
+    # tags, counting them takes ~95ms and this report ~0.1ms, so compiling
+    # it (e.g. with Numba) would gain nothing
+    all_tag_types = gen_counter.keys() | exp_counter.keys()
+    total_expected = sum(exp_counter.values())
+    correct_counts = sum((gen_counter & exp_counter).values())
     
     results = {
         'tag_types': {},
         'overall': {}
     }
     
-    print("="*70)
-    print("ACCURACY VERIFICATION REPORT")
-    print("="*70)
-    print()
+    # Report lines, written with a single call at the end
+    out = []
+    out.append("="*70)
+    out.append("ACCURACY VERIFICATION REPORT")
+    out.append("="*70)
+    out.append('')
     
     # Per-tag-type accuracy
-    print("Tag-by-Tag Accuracy:")
-    print("-"*70)
+    out.append("Tag-by-Tag Accuracy:")
+    out.append("-"*70)
     
     for tag_type in sorted(all_tag_types):
         gen_count = gen_counter[tag_type]
@@ -57,12 +137,9 @@ def calculate_accuracy(generated_xml, expected_xml):
             correct = min(gen_count, exp_count)
             accuracy = (correct / exp_count) * 100
             
-            correct_counts += correct
-            total_expected += exp_count
-            
             status = "Approved" if gen_count == exp_count else "Not Approved"
-            print(f"{status} {tag_type[:50]}")
-            print(f"   Expected: {exp_count}, Generated: {gen_count}, Accuracy: {accuracy:.1f}%")
+            out.append(f"{status} {tag_type[:50]}")
+            out.append(f"   Expected: {exp_count}, Generated: {gen_count}, Accuracy: {accuracy:.1f}%")
             
             results['tag_types'][tag_type] = {
                 'expected': exp_count,
@@ -73,29 +150,30 @@ def calculate_accuracy(generated_xml, expected_xml):
     # Overall accuracy
     overall_accuracy = (correct_counts / total_expected * 100) if total_expected > 0 else 0
     
-    print()
-    print("="*70)
-    print("OVERALL ACCURACY METRICS")
-    print("="*70)
-    print(f"Total Expected Tags: {total_expected}")
-    print(f"Total Generated Tags: {len(gen_tags)}")
-    print(f"Correct Tags: {correct_counts}")
-    print(f"Overall Accuracy: {overall_accuracy:.2f}%")
-    print()
+    out.append('')
+    out.append("="*70)
+    out.append("OVERALL ACCURACY METRICS")
+    out.append("="*70)
+    out.append(f"Total Expected Tags: {total_expected}")
+    out.append(f"Total Generated Tags: {total_generated}")
+    out.append(f"Correct Tags: {correct_counts}")
+    out.append(f"Overall Accuracy: {overall_accuracy:.2f}%")
+    out.append('')
     
     # Pass/Fail criteria
     if overall_accuracy >= 99.0:
-        print("  PASS: Accuracy >= 99%")
+        out.append("  PASS: Accuracy >= 99%")
         status = "PASS"
     else:
-        print(f"  FAIL: Accuracy {overall_accuracy:.2f}% < 99%")
+        out.append(f"  FAIL: Accuracy {overall_accuracy:.2f}% < 99%")
         status = "FAIL"
     
-    print("="*70)
+    out.append("="*70)
+    sys.stdout.write('\n'.join(out) + '\n')
     
     results['overall'] = {
         'total_expected': total_expected,
-        'total_generated': len(gen_tags),
+        'total_generated': total_generated,
         'correct': correct_counts,
         'accuracy': overall_accuracy,
         'status': status
@@ -105,15 +183,22 @@ def calculate_accuracy(generated_xml, expected_xml):
 
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python verify_accuracy.py <generated_xml> <expected_xml>")
+    args = sys.argv[1:]
+    try:
+        expected_counts = pop_expected_counts(args)
+    except (IndexError, OSError, ValueError) as e:
+        print(f"Error: cannot read --expected-counts: {e}")
+        sys.exit(1)
+    
+    if len(args) < 2:
+        print("Usage: python verify_accuracy.py <generated_xml> <expected_xml> [--expected-counts PATH]")
         sys.exit(1)
     
-    generated = sys.argv[1]
-    expected = sys.argv[2]
+    generated = args[0]
+    expected = args[1]
     
     try:
-        results = calculate_accuracy(generated, expected)
+        results = calculate_accuracy(generated, expected, expected_counts)
         sys.exit(0 if results['overall']['status'] == 'PASS' else 1)
     except Exception as e:
         print(f"Error: {e}")
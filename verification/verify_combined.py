@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Combined Accuracy and Completeness Verification Script
+Counts the tags of the generated and expected output once and prints both
+the accuracy and the completeness report from the same counts
+
+Exit status is a bit mask: 0 when both checks pass, plus ACCURACY_FAILED
+and/or COMPLETENESS_FAILED for the checks that did not. Usage and run
+errors exit with CHECK_ERROR. Any other status (such as Python's 1 for an
+uncaught exception) means the checks did not run; see decode_status.
+"""
+
+from collections import Counter
+import sys
+
+from verify_accuracy import accuracy_report, iter_tag_ids, pop_expected_counts
+from verify_completeness import completeness_report
+
+# Exit status bits, clear of the 1 and 2 Python itself exits with on an
+# uncaught exception or a command line error
+ACCURACY_FAILED = 4
+COMPLETENESS_FAILED = 8
+CHECK_ERROR = 16
+
+
+def decode_status(returncode):
+    """
+    Which checks passed, from an exit status of this script
+
+    Returns:
+        tuple: (accuracy passed, completeness passed); both False for a
+        status that is not a combination of the failure bits (an error,
+        a crash, or None for a run that never finished)
+    """
+    if returncode is None or returncode & ~(ACCURACY_FAILED | COMPLETENESS_FAILED):
+        return False, False
+    return not returncode & ACCURACY_FAILED, not returncode & COMPLETENESS_FAILED
+
+
+def verify(generated_xml, expected_xml, expected_counts=None):
+    """
+    Run the accuracy and completeness checks from one pass over each file
+
+    Args:
+        generated_xml: Path to the generated output
+        expected_xml: Path to the expected output
+        expected_counts: Counter of expected tag ids (skips parsing expected_xml)
+
+    Returns:
+        tuple: (accuracy results, completeness results)
+    """
+    gen_counter = Counter(iter_tag_ids(generated_xml))
+    exp_counter = expected_counts if expected_counts is not None else Counter(iter_tag_ids(expected_xml))
+
+    accuracy = accuracy_report(gen_counter, exp_counter)
+    print()
+    completeness = completeness_report(gen_counter, exp_counter)
+    return accuracy, completeness
+
+
+def main():
+    args = sys.argv[1:]
+    try:
+        expected_counts = pop_expected_counts(args)
+    except (IndexError, OSError, ValueError) as e:
+        print(f"Error: cannot read --expected-counts: {e}")
+        sys.exit(CHECK_ERROR)
+
+    if len(args) < 2:
+        print("Usage: python verify_combined.py <generated_xml> <expected_xml> [--expected-counts PATH]")
+        sys.exit(CHECK_ERROR)
+
+    generated = args[0]
+    expected = args[1]
+
+    try:
+        accuracy, completeness = verify(generated, expected, expected_counts)
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(CHECK_ERROR)
+
+    status = 0
+    if accuracy['overall']['status'] != 'PASS':
+        status |= ACCURACY_FAILED
+    if completeness['status'] != 'PASS':
+        status |= COMPLETENESS_FAILED
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,111 +4,125 @@ Completeness Verification Script
 Checks for missing tags compared to expected output
 """
 
-import xml.etree.ElementTree as ET
 from collections import Counter
 import sys
 
+from verify_accuracy import iter_tag_ids, pop_expected_counts
 
-def verify_completeness(generated_xml, expected_xml):
+# Structural tags (note root, header and subsections) are not entity tags
+_STRUCTURAL_TAGS = frozenset((
+    'NatureOfOperationsAndGoingConcernNote',
+    'NatureOfOperationsAndGoingConcernHeader',
+    'DescriptionOfNatureOfEntitysOperationsAndPrincipalActivities',
+    'DescriptionOfUncertaintiesOfEntitysAbilityToContinueAsGoingConcern',
+))
+
+
+def verify_completeness(generated_xml, expected_xml, expected_counts=None):
     """
     Verify no tags are missing compared to expected output
     
+    Args:
+        generated_xml: Path to the generated output
+        expected_xml: Path to the expected output
+        expected_counts: Counter of expected tag ids (skips parsing expected_xml)
+    
     Returns:
         dict with completeness metrics
     """
-    # Parse both files
-    gen_tree = ET.parse(generated_xml)
-    exp_tree = ET.parse(expected_xml)
-    
-    # Extract all tags with their text content
-    def extract_tags_with_content(tree):
-        tags = []
-        for elem in tree.iter('Tag'):
-            tag_id = elem.get('id')
-            if tag_id and tag_id not in [
-                'NatureOfOperationsAndGoingConcernNote',
-                'NatureOfOperationsAndGoingConcernHeader',
-                'DescriptionOfNatureOfEntitysOperationsAndPrincipalActivities',
-                'DescriptionOfUncertaintiesOfEntitysAbilityToContinueAsGoingConcern'
-            ]:  # Exclude structural tags
-                text = elem.text or ''
-                tags.append((tag_id, text.strip()))
-        return tags
-    
-    gen_tags = extract_tags_with_content(gen_tree)
-    exp_tags = extract_tags_with_content(exp_tree)
-    
-    print("="*70)
-    print("COMPLETENESS VERIFICATION REPORT")
-    print("="*70)
-    print()
-    
-    # Count by tag type
-    gen_counter = Counter([tag_id for tag_id, _ in gen_tags])
-    exp_counter = Counter([tag_id for tag_id, _ in exp_tags])
-    
-    # Check for missing tags
-    all_tag_types = set(exp_counter.keys())
-    missing_tags = {}
-    extra_tags = {}
-    
-    print("Tag Type Completeness:")
-    print("-"*70)
-    
-    for tag_type in sorted(all_tag_types):
+    gen_counter = Counter(iter_tag_ids(generated_xml))
+    exp_counter = expected_counts if expected_counts is not None else Counter(iter_tag_ids(expected_xml))
+    return completeness_report(gen_counter, exp_counter)
+
+
+def completeness_report(gen_counter, exp_counter):
+    """
+    Print the completeness report for two Counters of tag ids
+    
+    Structural tags are left out of both counts.
+    
+    Returns:
+        dict with completeness metrics
+    """
+    gen_counter = Counter({
+        tag_id: count for tag_id, count in gen_counter.items()
+        if tag_id not in _STRUCTURAL_TAGS
+    })
+    exp_counter = Counter({
+        tag_id: count for tag_id, count in exp_counter.items()
+        if tag_id not in _STRUCTURAL_TAGS
+    })
+    total_generated = sum(gen_counter.values())
+    total_expected = sum(exp_counter.values())
+    
+    out = []
+    out.append("="*70)
+    out.append("COMPLETENESS VERIFICATION REPORT")
+    out.append("="*70)
+    out.append('')
+    
+    # Check for missing tags (Counter subtraction keeps positive differences);
+    # extras are only counted for tag types the expected output has
+    missing_tags = dict(exp_counter - gen_counter)
+    extra_tags = {
+        tag_type: extra for tag_type, extra in (gen_counter - exp_counter).items()
+        if tag_type in exp_counter
+    }
+    
+    out.append("Tag Type Completeness:")
+    out.append("-"*70)
+    
+    for tag_type in sorted(exp_counter):
         exp_count = exp_counter[tag_type]
         gen_count = gen_counter[tag_type]
         
-        if gen_count < exp_count:
-            missing = exp_count - gen_count
-            missing_tags[tag_type] = missing
-            print(f"  {tag_type[:50]}")
-            print(f"   Expected: {exp_count}, Generated: {gen_count}, Missing: {missing}")
-        elif gen_count > exp_count:
-            extra = gen_count - exp_count
-            extra_tags[tag_type] = extra
-            print(f"   {tag_type[:50]}")
-            print(f"   Expected: {exp_count}, Generated: {gen_count}, Extra: {extra}")
+        if tag_type in missing_tags:
+            out.append(f"  {tag_type[:50]}")
+            out.append(f"   Expected: {exp_count}, Generated: {gen_count}, Missing: {missing_tags[tag_type]}")
+        elif tag_type in extra_tags:
+            out.append(f"   {tag_type[:50]}")
+            out.append(f"   Expected: {exp_count}, Generated: {gen_count}, Extra: {extra_tags[tag_type]}")
         else:
-            print(f"   {tag_type[:50]}")
-            print(f"   Expected: {exp_count}, Generated: {gen_count}")
-    
-    print()
-    print("="*70)
-    print("SUMMARY")
-    print("="*70)
-    print(f"Total Expected Tags: {len(exp_tags)}")
-    print(f"Total Generated Tags: {len(gen_tags)}")
-    print(f"Missing Tags: {sum(missing_tags.values())}")
-    print(f"Extra Tags: {sum(extra_tags.values())}")
-    print()
+            out.append(f"   {tag_type[:50]}")
+            out.append(f"   Expected: {exp_count}, Generated: {gen_count}")
+    
+    out.append('')
+    out.append("="*70)
+    out.append("SUMMARY")
+    out.append("="*70)
+    out.append(f"Total Expected Tags: {total_expected}")
+    out.append(f"Total Generated Tags: {total_generated}")
+    out.append(f"Missing Tags: {sum(missing_tags.values())}")
+    out.append(f"Extra Tags: {sum(extra_tags.values())}")
+    out.append('')
     
     # Completeness percentage
-    if len(exp_tags) > 0:
-        completeness = (min(len(gen_tags), len(exp_tags)) / len(exp_tags)) * 100
+    if total_expected > 0:
+        completeness = (min(total_generated, total_expected) / total_expected) * 100
     else:
         completeness = 100.0
     
-    print(f"Completeness: {completeness:.1f}%")
-    print()
+    out.append(f"Completeness: {completeness:.1f}%")
+    out.append('')
     
     # Pass/Fail
     if not missing_tags and not extra_tags:
-        print(" PASS: No missing or extra tags")
-        print("Completeness: 100%")
+        out.append(" PASS: No missing or extra tags")
+        out.append("Completeness: 100%")
         status = "PASS"
     else:
         if missing_tags:
-            print(f" FAIL: {sum(missing_tags.values())} missing tags")
+            out.append(f" FAIL: {sum(missing_tags.values())} missing tags")
         if extra_tags:
-            print(f" WARNING: {sum(extra_tags.values())} extra tags")
+            out.append(f" WARNING: {sum(extra_tags.values())} extra tags")
         status = "FAIL" if missing_tags else "WARNING"
     
-    print("="*70)
+    out.append("="*70)
+    sys.stdout.write('\n'.join(out) + '\n')
     
     return {
-        'expected_count': len(exp_tags),
-        'generated_count': len(gen_tags),
+        'expected_count': total_expected,
+        'generated_count': total_generated,
         'missing': missing_tags,
         'extra': extra_tags,
         'completeness': completeness,
@@ -117,15 +131,22 @@ def verify_completeness(generated_xml, expected_xml):
 
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python verify_completeness.py <generated_xml> <expected_xml>")
+    args = sys.argv[1:]
+    try:
+        expected_counts = pop_expected_counts(args)
+    except (IndexError, OSError, ValueError) as e:
+        print(f"Error: cannot read --expected-counts: {e}")
+        sys.exit(1)
+    
+    if len(args) < 2:
+        print("Usage: python verify_completeness.py <generated_xml> <expected_xml> [--expected-counts PATH]")
         sys.exit(1)
     
-    generated = sys.argv[1]
-    expected = sys.argv[2]
+    generated = args[0]
+    expected = args[1]
     
     try:
-        results = verify_completeness(generated, expected)
+        results = verify_completeness(generated, expected, expected_counts)
         sys.exit(0 if results['status'] == 'PASS' else 1)
     except Exception as e:
         print(f"Error: {e}")
@@ -5,27 +5,94 @@ Runs the tagger multiple times and verifies output is identical
 
 Run from project root:
     python verification/verify_determinism.py data/note_1_input_v1_1.xml 5
+
+Runs are in-process by default; pass --subprocess to run main.py in a
+fresh interpreter each time (e.g. to vary hash randomization too), and
+--hash to print output hashes.
 """
 
 import subprocess
 import hashlib
+import io
 import sys
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-def get_file_hash(filepath):
-    """Calculate MD5 hash of a file"""
-    with open(filepath, 'rb') as f:
-        return hashlib.md5(f.read()).hexdigest()
+from xml_handler import XMLHandler
 
 
-def verify_determinism(input_file, num_runs=10):
+def _run_in_process(input_file, output_file):
+    """
+    Tag input_file into output_file with a new handler
+    
+    A new handler per run keeps the tagger's entity cache from replaying
+    the previous run's results.
+    
+    Returns:
+        Error message, or None on success
+    """
+    try:
+        with redirect_stdout(io.StringIO()):  # progress lines, like the captured subprocess output
+            XMLHandler().process_file(input_file, output_file)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _run_subprocess(main_py, project_root, input_file, output_file):
+    """
+    Tag input_file into output_file by running main.py in a new interpreter
+    
+    Returns:
+        Error message, or None on success
+    """
+    result = subprocess.run(
+        ['python', main_py, input_file, output_file],
+        capture_output=True,
+        text=True,
+        cwd=project_root  # Run from project root
+    )
+    return result.stderr if result.returncode != 0 else None
+
+
+def _run_once(input_file, output_file, use_subprocess, main_py, project_root):
+    """
+    One tagger run (module level so pool workers can run it)
+    
+    Returns:
+        (error message or None, output bytes or None)
+    """
+    if use_subprocess:
+        error = _run_subprocess(main_py, project_root, input_file, output_file)
+    else:
+        error = _run_in_process(input_file, output_file)
+    if error is not None:
+        return error, None
+    with open(output_file, 'rb') as f:
+        return None, f.read()
+
+
+def verify_determinism(input_file, num_runs=10, use_subprocess=False, show_hash=False,
+                       workers=None):
     """
     Run tagger multiple times and verify outputs are identical
     
+    Each run's output is compared byte for byte with the first run's, which
+    is kept in memory; hashing would read the same bytes and add work.
+    
     Args:
         input_file: Input XML file path
         num_runs: Number of times to run (default: 10)
+        use_subprocess: Run main.py in a new interpreter for each run
+            instead of tagging in this process
+        show_hash: Also print each output's BLAKE2b hash
+        workers: Processes to spread the runs over (default: CPU count);
+            the runs are independent, so they can overlap
     
     Returns:
         bool: True if all outputs are identical
@@ -44,78 +111,88 @@ def verify_determinism(input_file, num_runs=10):
     if not os.path.isabs(input_file):
         input_file = os.path.join(project_root, input_file)
     
-    hashes = []
-    outputs = []
+    baseline = None
+    all_identical = True
+    workers = min(num_runs, workers or os.cpu_count() or 1)
     
-    for i in range(num_runs):
-        output_file = f'/tmp/determinism_test_run_{i}.xml'
-        outputs.append(output_file)
-        
-        # Run the tagger
-        result = subprocess.run(
-            ['python', main_py, input_file, output_file],
-            capture_output=True,
-            text=True,
-            cwd=project_root  # Run from project root
-        )
-        
-        if result.returncode != 0:
-            print(f"Run {i+1} failed with error")
-            print(result.stderr)
-            return False
-        
-        # Calculate hash
-        file_hash = get_file_hash(output_file)
-        hashes.append(file_hash)
-        
-        print(f"Run {i+1:2d}: {file_hash[:16]}... ", end="")
-        
-        if i == 0:
-            print("(baseline)")
-        elif file_hash == hashes[0]:
-            print("Match")
+    # Outputs go to a private directory that is removed however the runs end
+    with tempfile.TemporaryDirectory(prefix='determinism_') as tmp_dir:
+        jobs = [
+            (input_file, os.path.join(tmp_dir, f'run_{i}.xml'), use_subprocess, main_py, project_root)
+            for i in range(num_runs)
+        ]
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        if pool is None:
+            # Lazily, so a mismatch still skips the remaining runs
+            results = (_run_once(*job) for job in jobs)
         else:
-            print("MISMATCH!")
+            futures = [pool.submit(_run_once, *job) for job in jobs]
+            results = (future.result() for future in futures)
+        
+        try:
+            for i, (error, output) in enumerate(results):
+                if error is not None:
+                    print(f"Run {i+1} failed with error")
+                    print(error)
+                    return False
+                
+                if show_hash:
+                    print(f"Run {i+1:2d}: {hashlib.blake2b(output).hexdigest()[:16]}... ", end="")
+                else:
+                    print(f"Run {i+1:2d}: {len(output)} bytes... ", end="")
+                
+                if i == 0:
+                    baseline = output
+                    print("(baseline)")
+                elif output == baseline:
+                    print("Match")
+                else:
+                    print("MISMATCH!")
+                    all_identical = False
+                    break  # one mismatch already fails the check
+        finally:
+            if pool is not None:
+                # Stop runs that have not started after a failure or mismatch
+                for future in futures:
+                    future.cancel()
+                pool.shutdown()
     
     print()
     print("-"*70)
     
-    # Check if all hashes are identical
-    all_identical = len(set(hashes)) == 1
-    
     if all_identical:
         print(f"   PASS: All {num_runs} runs produced IDENTICAL output")
-        print(f"   Hash: {hashes[0]}")
+        if show_hash:
+            print(f"   Hash: {hashlib.blake2b(baseline).hexdigest()}")
         print()
         print("Determinism: GUARANTEED")
     else:
         print(f"   FAIL: Outputs differ across runs")
-        print(f"   Unique hashes: {len(set(hashes))}")
+        print(f"   Run {i+1} differs from run 1 (remaining runs skipped)")
         print()
         print("Determinism: NOT GUARANTEED")
     
     print("="*70)
     
-    # Cleanup
-    for output_file in outputs:
-        if os.path.exists(output_file):
-            os.remove(output_file)
-    
     return all_identical
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python verify_determinism.py <input_xml> [num_runs]")
+    use_subprocess = '--subprocess' in sys.argv
+    show_hash = '--hash' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ('--subprocess', '--hash')]
+    
+    if len(args) < 1:
+        print("Usage: python verify_determinism.py <input_xml> [num_runs] [--subprocess] [--hash]")
         print("\nExample (run from project root):")
         print("  python verification/verify_determinism.py data/note_1_input_v1_1.xml 5")
         sys.exit(1)
     
-    input_file = sys.argv[1]
-    num_runs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    input_file = args[0]
+    num_runs = int(args[1]) if len(args) > 1 else 10
     
     try:
-        is_deterministic = verify_determinism(input_file, num_runs)
+        is_deterministic = verify_determinism(input_file, num_runs, use_subprocess, show_hash)
         sys.exit(0 if is_deterministic else 1)
     except Exception as e:
         print(f"Error: {e}")